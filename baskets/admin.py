@@ -1,5 +1,18 @@
 from django.contrib import admin
 from .models import Basket
+from utils.admin import FastChangeListAdmin
 # Register your models here.
 
-admin.site.register (Basket)
\ No newline at end of file
+@admin.register(Basket)
+class BasketAdmin(FastChangeListAdmin):
+    list_display = ['id', 'name', 'store', 'status', 'owner', 'created_at']
+    list_select_related = ['owner']
+    list_filter = ['status']
+    # Prefix and exact searches, served by the UPPER(...) text_pattern_ops indexes from migration 0011
+    search_fields = ['^name', '^store', '=owner__username']
+    raw_id_fields = ['owner', 'shared_with']
+    ordering = ['-id']
+
+    def get_queryset(self, request):
+        #Soft-deleted baskets stay visible to staff until they are purged
+        return Basket.all_objects.all()
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Basket, ArchivedBasket
+from items.models import Item, ArchivedItem
+
+
+def archivable_baskets(days):
+    #Baskets completed more than `days` days ago, by creation date for those completed before completed_at existed
+    cutoff = timezone.now() - timedelta(days = days)
+    return Basket.objects.filter(
+        Q(completed_at__lt = cutoff) | Q(completed_at__isnull = True, created_at__lt = cutoff),
+        status = Basket.COMPLETED
+    )
+
+
+@transaction.atomic
+def archive_baskets(basket_ids, days):
+    #Copy a batch of baskets, their items and shares into the archive tables, then drop the hot rows.
+    #Checked again under the lock, a basket re-opened or deleted since it was picked stays where it is
+    baskets = list(archivable_baskets(days).select_for_update().filter(pk__in = basket_ids))
+    if not baskets:
+        return 0
+    ids = [basket.id for basket in baskets]
+
+    ArchivedBasket.objects.bulk_create([
+        ArchivedBasket(
+            id = basket.id,
+            name = basket.name,
+            store = basket.store,
+            created_at = basket.created_at,
+            completed_at = basket.completed_at,
+            status = basket.status,
+            owner_id = basket.owner_id
+        ) for basket in baskets
+    ])
+
+    shares = Basket.shared_with.through.objects.filter(basket_id__in = ids)
+    ArchivedBasket.shared_with.through.objects.bulk_create([
+        ArchivedBasket.shared_with.through(archivedbasket_id = share.basket_id, user_id = share.user_id)
+        for share in shares
+    ])
+
+    items = Item.objects.filter(basket_id__in = ids).values('id', 'name', 'status', 'position', 'basket_id', 'creator_id')
+    ArchivedItem.objects.bulk_create([ArchivedItem(**item) for item in items])
+
+    Item.objects.filter(basket_id__in = ids).delete()
+    Basket.objects.filter(pk__in = ids).delete()
+    return len(ids)
+
+
+def archive_completed(days, batch_size = 500):
+    #Archive in batches so each transaction stays short; yields the running total after every batch
+    total = 0
+    while True:
+        ids = list(archivable_baskets(days).order_by('pk').values_list('pk', flat = True)[:batch_size])
+        if not ids:
+            return
+        total += archive_baskets(ids, days)
+        yield total
+
+
+@transaction.atomic
+def restore_basket(pk):
+    """
+    Move a single archived basket (with its items and shares) back into the hot tables.
+    The archived row is locked first, so of two concurrent restores the second finds it gone
+    and raises ArchivedBasket.DoesNotExist.
+    """
+    archived = ArchivedBasket.objects.select_for_update().get(pk = pk)
+    basket = Basket.objects.create(
+        id = archived.id,
+        name = archived.name,
+        store = archived.store,
+        owner_id = archived.owner_id
+    )
+    #created_at is auto_now_add, and status goes in with an update too so the stats don't count the completion twice
+    Basket.objects.filter(pk = basket.pk).update(
+        created_at = archived.created_at,
+        completed_at = archived.completed_at,
+        status = archived.status
+    )
+    basket.shared_with.set(archived.shared_with.all())
+
+    items = archived.archived_items.values('id', 'name', 'status', 'position', 'basket_id', 'creator_id')
+    Item.objects.bulk_create([Item(**item) for item in items])
+
+    archived.delete()
+    basket.created_at = archived.created_at
+    basket.completed_at = archived.completed_at
+    basket.status = archived.status
+    return basket
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from baskets.archive import archive_completed
+
+
+class Command(BaseCommand):
+    help = 'Move baskets completed more than N days ago, with their items, into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type = int, default = 30, help = 'Only archive baskets completed more than this many days ago')
+        parser.add_argument('--batch-size', type = int, default = 500, help = 'Number of baskets moved per transaction')
+
+    def handle(self, *args, **options):
+        archived = 0
+        for archived in archive_completed(options['days'], options['batch_size']):
+            self.stdout.write(f'Archived {archived} baskets so far')
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} baskets'))
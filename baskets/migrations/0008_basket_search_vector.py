@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-19 17:03
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+from utils.operations import PostgresAddIndexConcurrently, PostgresRunSQL, batched_update
+
+# The search vector is maintained by Postgres itself, so bulk_create and queryset.update() keep it current too.
+# Other databases (SQLite for local testing) skip this and baskets/search.py falls back to icontains.
+TRIGGER = """
+    CREATE TRIGGER basket_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, store ON baskets_basket
+    FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(search_vector, 'pg_catalog.english', name, store)
+"""
+
+
+class Migration(migrations.Migration):
+    # Not atomic: the backfill commits batch by batch and the index is built concurrently,
+    # so the table isn't locked for the whole migration
+    atomic = False
+
+    dependencies = [
+        ('baskets', '0007_archivedbasket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='basket',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        PostgresRunSQL(TRIGGER, "DROP TRIGGER IF EXISTS basket_search_vector_update ON baskets_basket"),
+        batched_update('baskets_basket', "search_vector = to_tsvector('pg_catalog.english', coalesce(name, '') || ' ' || coalesce(store, ''))"),
+        PostgresAddIndexConcurrently(
+            model_name='basket',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='basket_search_vector_idx'),
+        ),
+    ]
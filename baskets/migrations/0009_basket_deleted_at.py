@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baskets', '0008_basket_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='basket',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
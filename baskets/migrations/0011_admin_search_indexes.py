@@ -0,0 +1,16 @@
+# Generated by Django 6.0 on 2026-10-19 17:12
+
+from django.db import migrations
+from utils.operations import upper_pattern_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baskets', '0010_storeaisle'),
+    ]
+
+    operations = [
+        upper_pattern_index('basket_name_upper_idx', 'baskets_basket', 'name'),
+        upper_pattern_index('basket_store_upper_idx', 'baskets_basket', 'store'),
+    ]
@@ -1,4 +1,11 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+
+#Hides soft-deleted baskets everywhere, the purge worker removes them for good later
+class BasketManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull = True)
+
 
 # Create your models here.
 class Basket(models.Model): 
@@ -15,6 +22,7 @@ class Basket(models.Model):
     name = models.CharField(max_length = 255)
     store = models.CharField (max_length = 255,blank=True, null=True )
     created_at = models.DateTimeField (auto_now_add=True)
+    completed_at = models.DateTimeField (null=True, blank=True, editable=False) #set by stats/signals.py when status becomes Completed
     
     status = models.CharField(
         max_length = 100,
@@ -33,9 +41,73 @@ class Basket(models.Model):
         related_name = 'baskets_shared', 
         blank = True
     )
+
+    #Kept up to date from name and store by a Postgres trigger, see migration 0008
+    search_vector = SearchVectorField(null = True, editable = False)
+
+    deleted_at = models.DateTimeField(null = True, blank = True, editable = False, db_index = True)
+
+    objects = BasketManager()
+    all_objects = models.Manager() #includes soft-deleted baskets
+
+    def save(self, *args, update_fields = None, **kwargs):
+        #The completion time is stamped with the status (stats/signals.py), so a save of the status saves it too
+        if update_fields is not None and 'status' in update_fields:
+            update_fields = {*update_fields, 'completed_at'}
+        super().save(*args, update_fields = update_fields, **kwargs)
     
     def __str__(self):
         my_string = self.name 
         if self.store: 
             my_string = my_string + f" ({self.store})"
-        return my_string
\ No newline at end of file
+        return my_string
+
+#Cold storage for completed baskets, moved here by the archive_baskets command
+class ArchivedBasket(models.Model):
+    id = models.BigIntegerField(primary_key = True) #keeps the original basket id so it can be restored
+    name = models.CharField(max_length = 255)
+    store = models.CharField(max_length = 255, blank = True, null = True)
+    created_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null = True, blank = True)
+    archived_at = models.DateTimeField(auto_now_add = True)
+
+    status = models.CharField(
+        max_length = 100,
+        choices = Basket.STATUS_CHOICES,
+        default = Basket.COMPLETED
+    )
+
+    owner = models.ForeignKey(
+        to = 'users.User',
+        on_delete = models.CASCADE,
+        related_name = 'baskets_archived'
+    )
+
+    shared_with = models.ManyToManyField(
+        to = 'users.User',
+        related_name = 'baskets_shared_archived',
+        blank = True
+    )
+
+    def __str__(self):
+        my_string = self.name
+        if self.store:
+            my_string = my_string + f" ({self.store})"
+        return my_string
+
+
+#Which aisle a store keeps an item in, set by the basket owner and used to sort items server-side
+class StoreAisle(models.Model):
+    owner = models.ForeignKey(
+        to = 'users.User',
+        on_delete = models.CASCADE,
+        related_name = 'store_aisles'
+    )
+    store = models.CharField(max_length = 255)
+    name_key = models.CharField(max_length = 255) #lowercased item name
+    aisle = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields = ['owner', 'store', 'name_key'], name = 'unique_store_aisle')
+        ]
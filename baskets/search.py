@@ -0,0 +1,60 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, Q, Value, FloatField
+from .models import Basket
+from items.models import Item
+
+
+def visible_baskets(user):
+    #Baskets the user owns or that were shared with them
+    return Basket.objects.filter(Q(owner=user) | Q(shared_with=user)).values('pk')
+
+
+def search_postgres(user, text):
+    query = SearchQuery(text, config='english', search_type='websearch')
+    baskets = (Basket.objects
+        .filter(pk__in=visible_baskets(user), search_vector=query)
+        .annotate(rank=SearchRank(F('search_vector'), query)))
+    items = (Item.objects
+        .filter(basket__in=visible_baskets(user), search_vector=query)
+        .annotate(rank=SearchRank(F('search_vector'), query)))
+    return baskets, items
+
+
+def search_fallback(user, text):
+    #icontains on every field, for databases without full-text search (local SQLite)
+    rank = Value(1.0, output_field=FloatField())
+    baskets = (Basket.objects
+        .filter(Q(name__icontains=text) | Q(store__icontains=text), pk__in=visible_baskets(user))
+        .annotate(rank=rank))
+    items = (Item.objects
+        .filter(name__icontains=text, basket__in=visible_baskets(user))
+        .annotate(rank=rank))
+    return baskets, items
+
+
+def search(user, text, offset, limit):
+    """
+    Ranked hits across the user's baskets and items, newest first on equal rank.
+    Returns (total, hits) for the requested page.
+    """
+    if connection.vendor == 'postgresql':
+        baskets, items = search_postgres(user, text)
+    else:
+        baskets, items = search_fallback(user, text)
+
+    total = baskets.count() + items.count()
+
+    #Each side only needs its best offset + limit rows for the merged window to be right
+    window = offset + limit
+    baskets = baskets.order_by('-rank', '-created_at', '-pk').values('pk', 'name', 'store', 'status', 'created_at', 'rank')[:window]
+    items = (items
+        .order_by('-rank', '-basket__created_at', '-pk')
+        .values('pk', 'name', 'status', 'rank', 'basket', basket_name=F('basket__name'),
+                store=F('basket__store'), created_at=F('basket__created_at'))[:window])
+
+    hits = [{'type': 'basket', **basket} for basket in baskets] + [{'type': 'item', **item} for item in items]
+    hits.sort(key=lambda hit: (hit['rank'], hit['created_at']), reverse=True)
+    for hit in hits:
+        hit['id'] = hit.pop('pk')
+    return total, hits[offset:window]
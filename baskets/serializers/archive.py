@@ -0,0 +1,10 @@
+from rest_framework.serializers import ModelSerializer
+from ..models import ArchivedBasket
+from items.serializers.common import ArchivedItemSerializer
+
+class ArchivedBasketSerializer (ModelSerializer):
+    archived_items = ArchivedItemSerializer(many = True, read_only = True)
+
+    class Meta:
+        model = ArchivedBasket
+        fields = '__all__'
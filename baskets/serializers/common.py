@@ -4,4 +4,4 @@ from ..models import Basket
 class BasketSerializer(ModelSerializer):
     class Meta: 
         model = Basket
-        fields = '__all__'
\ No newline at end of file
+        exclude = ['search_vector', 'deleted_at']
\ No newline at end of file
@@ -1,3 +1,230 @@
-from django.test import TestCase
+import gzip
+import json
+from datetime import timedelta
+from unittest import skipIf, skipUnless
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, router
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from items.models import Item
+from users.models import User
+from utils import compression
+from utils.compression import CompressionMiddleware, choose_encoding
+from utils.db_router import ReplicaPinningMiddleware, use_replicas
+from .archive import archive_baskets, archive_completed
+from .models import ArchivedBasket, Basket, StoreAisle
 
-# Create your tests here.
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(DATABASE_REPLICAS = ['replica1'], DATABASE_REPLICA_LAG = 5, CACHES = LOCMEM)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.token = use_replicas.set(True)
+
+    def tearDown(self):
+        use_replicas.reset(self.token)
+
+    def read_alias(self, request, status = 200):
+        #Run a request through a fresh middleware, standing in for any gunicorn worker, and report where a read inside it goes
+        seen = {}
+
+        def view(request):
+            seen['alias'] = router.db_for_read(Basket)
+            return HttpResponse(status = status)
+
+        ReplicaPinningMiddleware(view)(request)
+        return seen['alias']
+
+    def test_reads_use_replica(self):
+        self.assertEqual(router.db_for_read(Basket), 'replica1')
+
+    def test_reads_outside_a_request_use_primary(self):
+        #Management commands, the task worker and after-commit tasks never opt in
+        use_replicas.set(False)
+        self.assertEqual(router.db_for_read(Basket), 'default')
+
+    def test_writes_pin_the_rest_of_the_request(self):
+        self.assertEqual(router.db_for_write(Basket), 'default')
+        self.assertEqual(router.db_for_read(Basket), 'default')
+
+    def test_write_pins_next_request_of_same_client_on_any_worker(self):
+        auth = {'HTTP_AUTHORIZATION': 'Bearer alice'}
+        self.assertEqual(self.read_alias(self.factory.post('/baskets/new/', **auth)), 'default')
+        self.assertEqual(self.read_alias(self.factory.get('/baskets/', **auth)), 'default')
+        self.assertEqual(self.read_alias(self.factory.get('/baskets/', HTTP_AUTHORIZATION = 'Bearer bob')), 'replica1')
+
+    def test_failed_write_does_not_pin(self):
+        auth = {'HTTP_AUTHORIZATION': 'Bearer alice'}
+        self.read_alias(self.factory.post('/baskets/new/', **auth), status = 400)
+        self.assertEqual(self.read_alias(self.factory.get('/baskets/', **auth)), 'replica1')
+
+    @override_settings(REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_anonymous_pins_follow_the_forwarded_client_ip(self):
+        #Every request arrives from the platform router's address, only the forwarded IP tells clients apart
+        router_ip = {'REMOTE_ADDR': '10.0.0.1'}
+        self.read_alias(self.factory.post('/auth/sign-up/', HTTP_X_FORWARDED_FOR = '1.1.1.1', **router_ip))
+        self.assertEqual(self.read_alias(self.factory.get('/baskets/', HTTP_X_FORWARDED_FOR = '1.1.1.1', **router_ip)), 'default')
+        self.assertEqual(self.read_alias(self.factory.get('/baskets/', HTTP_X_FORWARDED_FOR = '2.2.2.2', **router_ip)), 'replica1')
+
+
+@skipUnless('replica1' in settings.DATABASES, 'set PGREPLICA_HOSTS to run against a second database')
+class ReplicaQueryTests(TestCase):
+    databases = {'default', *settings.DATABASE_REPLICAS}
+
+    def test_queries_follow_the_router(self):
+        token = use_replicas.set(True)
+        try:
+            with CaptureQueriesContext(connections['replica1']) as replica, CaptureQueriesContext(connections['default']) as primary:
+                list(Basket.objects.all())
+            self.assertEqual((len(replica), len(primary)), (1, 0))
+
+            router.db_for_write(Basket) #what any save does first
+            with CaptureQueriesContext(connections['replica1']) as replica, CaptureQueriesContext(connections['default']) as primary:
+                list(Basket.objects.all())
+            self.assertEqual((len(replica), len(primary)), (0, 1))
+        finally:
+            use_replicas.reset(token)
+
+
+class StoreAisleViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username = 'alice', email = 'alice@x.com', password = 'pw'))
+
+    def put(self, body):
+        return self.client.put('/baskets/aisles/', body, format = 'json')
+
+    def test_replaces_the_map_with_normalized_names(self):
+        response = self.put({'store': 'Tesco', 'aisles': {' Milk ': 3, 'bread': 1}})
+        self.assertEqual(response.data['aisles'], {'milk': 3, 'bread': 1})
+        self.assertEqual(self.client.get('/baskets/aisles/', {'store': 'Tesco'}).data['aisles'], {'milk': 3, 'bread': 1})
+
+    def test_rejects_malformed_bodies(self):
+        for body in [['Tesco'], 'Tesco', {'store': 3, 'aisles': {}}, {'store': '', 'aisles': {}},
+                     {'store': 'Tesco', 'aisles': {'milk': True}}, {'store': 'Tesco', 'aisles': {'milk': -1}}]:
+            self.assertEqual(self.put(body).status_code, 400, body)
+        self.assertFalse(StoreAisle.objects.exists())
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username = 'alice', email = 'alice@x.com', password = 'pw')
+        long_ago = timezone.now() - timedelta(days = 100)
+        self.baskets = [Basket.objects.create(name = f'week {n}', owner = self.owner) for n in range(3)]
+        Basket.objects.update(status = Basket.COMPLETED, completed_at = long_ago)
+
+    def test_rechecks_baskets_under_the_lock(self):
+        ids = [basket.pk for basket in self.baskets]
+        #Picked while archivable, then re-opened and deleted before the batch ran
+        Basket.objects.filter(pk = ids[0]).update(status = Basket.OPEN, completed_at = None)
+        Basket.objects.filter(pk = ids[1]).update(deleted_at = timezone.now())
+        self.assertEqual(archive_baskets(ids, 30), 1)
+        self.assertEqual(list(ArchivedBasket.objects.values_list('pk', flat = True)), [ids[2]])
+
+    def test_history_is_paginated(self):
+        list(archive_completed(30))
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get('/baskets/history/', {'limit': 2})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+
+class BasketSearchViewTests(TestCase):
+    def setUp(self):
+        alice, bob = [User.objects.create_user(username = name, email = f'{name}@x.com', password = 'pw') for name in ('alice', 'bob')]
+        self.weekly = Basket.objects.create(name = 'Weekly shop', store = 'Tesco', owner = alice)
+        self.party = Basket.objects.create(name = 'Party', store = 'Aldi', owner = bob)
+        self.party.shared_with.add(alice)
+        Item.objects.create(name = 'Tesco bread', basket = self.party, creator = bob)
+        Basket.objects.create(name = 'Tesco run', owner = bob) #not shared with alice
+        self.client = APIClient()
+        self.client.force_authenticate(alice)
+
+    def search(self, **params):
+        response = self.client.get('/baskets/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_finds_own_and_shared_baskets_and_items(self):
+        data = self.search(q = 'tesco')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual({(hit['type'], hit['id']) for hit in data['results']},
+                         {('basket', self.weekly.pk), ('item', Item.objects.get().pk)})
+
+    def test_pages_through_the_hits(self):
+        first = self.search(q = 'tesco', limit = 1)
+        second = self.search(q = 'tesco', limit = 1, offset = 1)
+        self.assertIsNotNone(first['next'])
+        self.assertIsNone(second['next'])
+        self.assertNotEqual(first['results'], second['results'])
+
+    def test_requires_a_query(self):
+        self.assertEqual(self.client.get('/baskets/search/', {'q': ' '}).status_code, 400)
+
+    @skipIf(connection.vendor == 'postgresql', 'icontains fallback for databases without full-text search')
+    def test_fallback_matches_substrings(self):
+        self.assertEqual(self.search(q = 'esc')['count'], 2)
+
+    @skipUnless(connection.vendor == 'postgresql', 'needs the Postgres search vector triggers')
+    def test_postgres_matches_stemmed_words_and_ranks(self):
+        Basket.objects.filter(pk = self.weekly.pk).update(name = 'Weekly shopping')
+        data = self.search(q = 'shop')
+        self.assertEqual([hit['id'] for hit in data['results']], [self.weekly.pk])
+        self.assertGreater(data['results'][0]['rank'], 0)
+
+
+@override_settings(API_COMPRESSION = {'MIN_SIZE': 100, 'BROTLI': False})
+class CompressionTests(SimpleTestCase):
+    payload = {'baskets': [{'name': f'basket {n}', 'items': ['milk', 'eggs', 'bread']} for n in range(50)]}
+
+    def respond(self, response, accept = 'gzip'):
+        request = RequestFactory().get('/baskets/', HTTP_ACCEPT_ENCODING = accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiates_the_encoding(self):
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(choose_encoding('*;q=0.5'), 'gzip')
+        self.assertIsNone(choose_encoding('gzip;q=0, identity'))
+        self.assertIsNone(choose_encoding(''))
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_prefers_brotli_unless_gzip_is_weighted_higher(self):
+        with override_settings(API_COMPRESSION = {'BROTLI': True}):
+            self.assertEqual(choose_encoding('gzip, br'), 'br')
+            self.assertEqual(choose_encoding('gzip, br;q=0.5'), 'gzip')
+            response = self.respond(JsonResponse(self.payload), 'br')
+            self.assertEqual(json.loads(compression.brotli.decompress(response.content)), self.payload)
+
+    def test_compresses_large_json(self):
+        response = self.respond(JsonResponse(self.payload))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.payload)
+
+    def test_weakens_strong_etags(self):
+        response = JsonResponse(self.payload)
+        response['ETag'] = '"v1"'
+        self.assertEqual(self.respond(response)['ETag'], 'W/"v1"')
+
+    def test_leaves_small_other_and_unaccepted_responses_alone(self):
+        self.assertFalse(self.respond(JsonResponse({'ok': True})).has_header('Content-Encoding'))
+        self.assertFalse(self.respond(HttpResponse('x' * 1000, content_type = 'text/html')).has_header('Content-Encoding'))
+        response = self.respond(JsonResponse(self.payload), 'identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_streams_are_compressed_chunk_by_chunk(self):
+        chunks = [json.dumps(self.payload).encode()[n:n + 200] for n in range(0, 2000, 200)]
+        response = self.respond(StreamingHttpResponse(iter(chunks), content_type = 'application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import BasketsView , BasketsDetailsView, BasketUserView
+from .views import BasketsView , BasketsDetailsView, BasketUserView, BasketHistoryView, BasketRestoreView, BasketSearchView, StoreAisleView
 from items.views import ItemsView
 
 
@@ -7,5 +7,9 @@ urlpatterns = [
     path('new/', BasketsView.as_view()),    
     path('', BasketUserView.as_view()), 
     path ('<int:pk>/items/',ItemsView.as_view() ),
-    path ('<int:pk>/',BasketsDetailsView.as_view())
+    path ('<int:pk>/',BasketsDetailsView.as_view()),
+    path ('history/', BasketHistoryView.as_view()),
+    path ('history/<int:pk>/restore/', BasketRestoreView.as_view()),
+    path ('search/', BasketSearchView.as_view()),
+    path ('aisles/', StoreAisleView.as_view())
 ]
\ No newline at end of file
@@ -1,11 +1,21 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from .serializers.common import BasketSerializer
-from .models import Basket
+from .models import Basket, ArchivedBasket, StoreAisle
 from rest_framework.permissions import IsAuthenticated
 from utils.permissions import IsOwnerOrShared
 from .serializers.populate import PopulatedBasketSerializer
+from .serializers.archive import ArchivedBasketSerializer
+from .archive import restore_basket
+from utils.idempotency import idempotent
+from utils.pagination import PaginatedView
+from rest_framework.utils.urls import replace_query_param
+from .search import search
+from utils.purge import soft_delete
+from items.autocomplete import normalize
+from items.ordering import basket_items, archived_items
+from django.db import transaction
 
 # Create your views here.
 class BasketsView (APIView): 
@@ -18,6 +28,7 @@ class BasketsView (APIView):
         return Response (serializer.data)
 
     #Create a new basket
+    @idempotent
     def post (self, request): 
         request.data ['owner'] = request.user.id
         serializer = BasketSerializer (data=request.data)
@@ -33,7 +44,7 @@ class BasketUserView(APIView):
     def get (self, request):  
         baskets_owned = Basket.objects.filter(owner=request.user.id)
         baskets_shared = Basket.objects.filter (shared_with=request.user.id)
-        baskets = (baskets_owned | baskets_shared).distinct()
+        baskets = (baskets_owned | baskets_shared).distinct().prefetch_related(basket_items())
         serializer = PopulatedBasketSerializer (baskets, many=True)
         return Response (serializer.data, status=201)
 
@@ -41,18 +52,19 @@ class BasketUserView(APIView):
 class BasketsDetailsView(APIView):
     permission_classes = [IsOwnerOrShared]    
     
-    def get_object (self, pk): 
+    def get_object (self, pk, queryset = Basket.objects): 
         try: 
-           return Basket.objects.get (pk=pk)
+           return queryset.get (pk=pk)
         except Basket.DoesNotExist: 
             raise NotFound (detail = 'Basket is no longer available')
     
     def get (self, request, pk):
-        basket = self.get_object(pk)
+        basket = self.get_object(pk, Basket.objects.prefetch_related(basket_items()))
         self.check_object_permissions(request, basket)
         serializer =PopulatedBasketSerializer(basket)
         return Response (serializer.data)
     
+    @idempotent
     def put (self, request, pk):      
         basket = self.get_object (pk)
         self.check_object_permissions(request, basket)
@@ -61,8 +73,107 @@ class BasketsDetailsView(APIView):
         serializer.save()
         return Response (serializer.data)
         
+    @idempotent
     def delete (self, request, pk):
         basket= self.get_object (pk)
         self.check_object_permissions(request, basket)
-        basket.delete()
-        return Response (status = 204)
\ No newline at end of file
+        #Hidden straight away, the items are deleted later in batches
+        soft_delete(basket)
+        return Response (status = 204)
+
+
+class BasketHistoryView(PaginatedView):
+    #Index the archived baskets a user owned or was shared on, most recently archived first
+    def get (self, request):
+        baskets_owned = ArchivedBasket.objects.filter(owner=request.user.id)
+        baskets_shared = ArchivedBasket.objects.filter(shared_with=request.user.id)
+        baskets = (baskets_owned | baskets_shared).distinct().order_by('-archived_at', '-id').prefetch_related(archived_items())
+        return self.paginate(baskets, ArchivedBasketSerializer)
+
+
+class BasketRestoreView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_object (self, pk):
+        try:
+            return ArchivedBasket.objects.get(pk=pk)
+        except ArchivedBasket.DoesNotExist:
+            raise NotFound (detail = 'Archived basket is no longer available')
+
+    #Move an archived basket back into the active baskets, owner only
+    def post (self, request, pk):
+        archived = self.get_object(pk)
+        if request.user.id != archived.owner_id:
+            raise PermissionDenied
+        try:
+            basket = restore_basket(archived.pk)
+        except ArchivedBasket.DoesNotExist:
+            raise NotFound (detail = 'Archived basket is no longer available')
+        basket = Basket.objects.prefetch_related(basket_items()).get(pk=basket.pk)
+        serializer = PopulatedBasketSerializer(basket)
+        return Response (serializer.data, status=201)
+
+
+class BasketSearchView(APIView):
+    permission_classes = [IsAuthenticated]
+    max_limit = 100
+
+    def get_int_param (self, request, name, default):
+        try:
+            return max(0, int(request.query_params.get(name, default)))
+        except ValueError:
+            raise ValidationError({name: 'Expected a number.'})
+
+    #Search the names and stores of the user's baskets and the names of their items
+    def get (self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'Enter something to search for.'})
+        limit = min(self.get_int_param(request, 'limit', 20), self.max_limit) or 20
+        offset = self.get_int_param(request, 'offset', 0)
+        total, hits = search(request.user, text, offset, limit)
+
+        url = request.build_absolute_uri()
+        next_url = replace_query_param(url, 'offset', offset + limit) if offset + limit < total else None
+        previous_url = replace_query_param(url, 'offset', max(offset - limit, 0)) if offset > 0 else None
+        return Response ({'count': total, 'next': next_url, 'previous': previous_url, 'results': hits})
+
+
+class StoreAisleView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_store (self, store):
+        if not isinstance(store, str) or not store:
+            raise ValidationError({'store': 'This field is required.'})
+        if len(store) > StoreAisle._meta.get_field('store').max_length:
+            raise ValidationError({'store': 'Store name is too long.'})
+        return store
+
+    def is_aisle (self, aisle):
+        #bool is an int too, true/false aren't aisle numbers
+        return isinstance(aisle, int) and not isinstance(aisle, bool) and 0 <= aisle <= 2147483647
+
+    #The signed-in user's aisle map for one store, {item name: aisle}
+    def get (self, request):
+        store = self.get_store(request.query_params.get('store'))
+        aisles = StoreAisle.objects.filter(owner=request.user, store=store).values_list('name_key', 'aisle')
+        return Response ({'store': store, 'aisles': dict(aisles)})
+
+    #Replace the aisle map for a store: {"store": "Tesco", "aisles": {"milk": 3, "bread": 1}}
+    def put (self, request):
+        if not isinstance(request.data, dict):
+            raise ValidationError({'detail': 'Expected an object with "store" and "aisles".'})
+        store = self.get_store(request.data.get('store'))
+        aisles = request.data.get('aisles')
+        if not isinstance(aisles, dict) or not all(self.is_aisle(aisle) for aisle in aisles.values()):
+            raise ValidationError({'aisles': 'Expected an object of item name to aisle number.'})
+        max_name = StoreAisle._meta.get_field('name_key').max_length
+        if any(len(normalize(name)) > max_name for name in aisles):
+            raise ValidationError({'aisles': f'Item names can be at most {max_name} characters.'})
+        rows = {normalize(name): aisle for name, aisle in aisles.items() if normalize(name)}
+        with transaction.atomic():
+            StoreAisle.objects.filter(owner=request.user, store=store).delete()
+            StoreAisle.objects.bulk_create([
+                StoreAisle(owner=request.user, store=store, name_key=name, aisle=aisle) for name, aisle in rows.items()
+            ])
+        return Response ({'store': store, 'aisles': rows})
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 import os
 from pathlib import Path
 import environ
+from corsheaders.defaults import default_headers
 
 
 env = environ.Env()
@@ -59,6 +60,13 @@ else:
     ]
 
 
+# Let the frontend send Idempotency-Key on writes (see utils/idempotency.py)
+CORS_ALLOW_HEADERS = (
+    *default_headers,
+    'idempotency-key',
+)
+
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -72,28 +80,97 @@ INSTALLED_APPS = [
     'users',
     'baskets',
     'items', 
+    'tasks',
+    'stats',
 
     # Third party
     'corsheaders',
 ]
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES':[
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ]
+        'users.authentication.RevocableJWTAuthentication',
+    ],
+    # Rates for the auth throttles in utils/throttling.py, per IP and per targeted username
+    'DEFAULT_THROTTLE_RATES': {
+        'sign_in': env('THROTTLE_SIGN_IN', default='20/min'),
+        'sign_in_user': env('THROTTLE_SIGN_IN_USER', default='5/min'),
+        'sign_up': env('THROTTLE_SIGN_UP', default='10/hour'),
+        'password_reset': env('THROTTLE_PASSWORD_RESET', default='5/hour'),
+        'password_reset_user': env('THROTTLE_PASSWORD_RESET_USER', default='3/hour'),
+    },
+    # Number of proxies in front of the app (the Heroku router), so throttles key on the real client IP.
+    # Only the last X-Forwarded-For entries are trusted, earlier ones are set by the client and can be spoofed
+    'NUM_PROXIES': env.int('NUM_PROXIES', default=1),
 }
 
+# 'cache' shares throttle counters through the Django cache, 'local' keeps them in-process (single node, tests)
+THROTTLE_COUNTER = env('THROTTLE_COUNTER', default='cache')
+
 from datetime import timedelta
 SIMPLE_JWT = {
-    "ACCESS_TOKEN_LIFETIME": timedelta (days = 7),
-    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.tokens.MyTokenObtainPairSerializer"
+    # Short-lived access tokens, the client renews them at auth/token/refresh/ with the refresh token
+    "ACCESS_TOKEN_LIFETIME": timedelta (minutes = env.int('ACCESS_TOKEN_MINUTES', default=15)),
+    "REFRESH_TOKEN_LIFETIME": timedelta (days = env.int('REFRESH_TOKEN_DAYS', default=7)),
+    "ROTATE_REFRESH_TOKENS": True,
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.tokens.MyTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.tokens.RevocableTokenRefreshSerializer",
+}
+
+# Seconds between each process pulling new token revocations into its in-memory denylist (users/revocation.py)
+TOKEN_REVOCATION_SYNC = env.int('TOKEN_REVOCATION_SYNC', default=5)
+# Each sync re-reads revocations updated this many seconds before the previous one, for late commits
+TOKEN_REVOCATION_WINDOW = env.int('TOKEN_REVOCATION_WINDOW', default=60)
+
+# Idempotency keys, throttle counters and read-your-writes pins only work across gunicorn workers
+# and dynos when they all see the same cache, and the cache must not be the database they protect.
+# Production requires CACHE_URL (e.g. redis://...), development falls back to an in-process cache
+if DEBUG:
+    CACHES = {'default': env.cache('CACHE_URL', default='locmemcache://')}
+else:
+    CACHES = {'default': env.cache('CACHE_URL')}
+
+# How long a write's response is kept for retries with the same Idempotency-Key (seconds)
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=60 * 60 * 24)
+
+# Size of the in-process item name autocomplete cache (see items/autocomplete.py)
+ITEM_SUGGESTION_INDEX = {
+    'max_users': env.int('ITEM_SUGGESTION_MAX_USERS', default=1000),
+    'max_names': env.int('ITEM_SUGGESTION_MAX_NAMES', default=2000),
+    'ttl': env.int('ITEM_SUGGESTION_TTL', default=300),
+}
+
+# Soft-deleted users and baskets are purged by the in-process task pool when True,
+# otherwise by the `manage.py run_tasks` worker (`manage.py purge_deleted` sweeps anything left over)
+PURGE_IN_PROCESS = env.bool('PURGE_IN_PROCESS', default=False)
+PURGE_BATCH_SIZE = env.int('PURGE_BATCH_SIZE', default=1000)
+
+# Background tasks (tasks/queue.py): thread pool size, retries and backoff in seconds.
+# EAGER runs deferred tasks inline, which is handy in tests
+TASKS = {
+    'WORKERS': env.int('TASK_WORKERS', default=4),
+    'IN_PROCESS_ATTEMPTS': 3,
+    'MAX_ATTEMPTS': env.int('TASK_MAX_ATTEMPTS', default=5),
+    'RETRY_DELAY': 1,
+    'RUNNING_TIMEOUT': 600,
+    'BATCH_DELAY': 0.05, #seconds a batch task waits for more values before it runs
+    'EAGER': env.bool('TASKS_EAGER', default=False),
+}
+
+# gzip/brotli for JSON API responses (utils/compression.py), brotli is used when the package is installed
+API_COMPRESSION = {
+    'MIN_SIZE': env.int('COMPRESSION_MIN_SIZE', default=1024),
+    'GZIP_LEVEL': env.int('COMPRESSION_GZIP_LEVEL', default=1),
+    'BROTLI_QUALITY': env.int('COMPRESSION_BROTLI_QUALITY', default=4),
 }
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'utils.compression.CompressionMiddleware', # before anything that changes the response body
     'corsheaders.middleware.CorsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', 
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'utils.db_router.ReplicaPinningMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -133,6 +210,22 @@ DATABASES = {
     }
 }
 
+# Optional read replicas, e.g. PGREPLICA_HOSTS=replica-1.example.com,replica-2.example.com
+# Safe reads are routed to them by utils/db_router.py, everything else stays on 'default'
+DATABASE_REPLICAS = []
+for index, host in enumerate(env.list('PGREPLICA_HOSTS', default=[]), start=1):
+    DATABASE_REPLICAS.append(f'replica{index}')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['utils.db_router.ReplicaRouter']
+
+# Seconds a client keeps reading from the primary after its own write (read-your-writes)
+DATABASE_REPLICA_LAG = env.int('DATABASE_REPLICA_LAG', default=5)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
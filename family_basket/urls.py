@@ -21,5 +21,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path ('baskets/', include('baskets.urls')),
     path ('auth/', include ('users.urls')),
-    path('items/', include ('items.urls'))
+    path('items/', include ('items.urls')),
+    path('tasks/', include ('tasks.urls')),
+    path('stats/', include ('stats.urls'))
 ]
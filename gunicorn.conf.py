@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration for family_basket, loaded by the Procfile.
+
+Every value can be overridden from the environment, so a dyno size change
+only needs a config var, not a deploy.
+"""
+
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Threaded workers: requests spend most of their time waiting on Postgres,
+# so a few threads per process serve more requests than extra processes would
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = env_int('WEB_CONCURRENCY', cpu_count * 2 + 1)
+threads = env_int('GUNICORN_THREADS', 4)
+
+# Import Django, DRF, simplejwt and every app once in the master, workers fork with them already loaded
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers now and then so slow leaks can't grow forever, jittered so they don't all restart together
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# Heroku's router gives up after 30 seconds and sends SIGTERM on restarts with 30 seconds to finish
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 25)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    # With preload_app the application is already imported here, in the master, before any worker forks.
+    # Resolving the URLconf also imports every view, serializer, DRF and simplejwt, which Django would
+    # otherwise do lazily on each worker's first request
+    if preload_app:
+        from django.urls import get_resolver
+        get_resolver().url_patterns
+
+
+def post_fork(server, worker):
+    # Never share DB connections opened in the master with forked workers
+    from django.db import connections
+    connections.close_all()
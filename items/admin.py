@@ -1,3 +1,14 @@
 from django.contrib import admin
+from .models import Item
+from utils.admin import FastChangeListAdmin
 
 # Register your models here.
+@admin.register(Item)
+class ItemAdmin(FastChangeListAdmin):
+    list_display = ['id', 'name', 'status', 'basket', 'creator']
+    list_select_related = ['basket', 'creator']
+    list_filter = ['status']
+    # Served by the UPPER(name) text_pattern_ops index from migration 0007
+    search_fields = ['^name']
+    raw_id_fields = ['basket', 'creator']
+    ordering = ['-id']
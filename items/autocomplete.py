@@ -0,0 +1,122 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from tasks.queue import batch_task
+from baskets.models import Basket
+from .models import Item, ItemSuggestion
+
+
+def normalize(name):
+    return ' '.join(name.split()).lower()
+
+
+class SuggestionIndex:
+    """
+    Bounded in-process LRU of per-user suggestion lists.
+    Each entry holds the user's names sorted by key, so a prefix query is a bisect plus a short scan.
+    Entries expire after `ttl` seconds so other workers' updates show up eventually.
+    """
+    def __init__(self, max_users = 1000, max_names = 2000, ttl = 300):
+        self.max_users = max_users
+        self.max_names = max_names
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def load(self, user_id):
+        rows = (ItemSuggestion.objects
+            .filter(user_id = user_id)
+            .order_by('-count')
+            .values_list('name_key', 'name', 'count')[:self.max_names])
+        return sorted(rows)
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry and now - entry[0] < self.ttl:
+                self.entries.move_to_end(user_id)
+                return entry[1]
+        rows = self.load(user_id)
+        with self.lock:
+            self.entries[user_id] = (now, rows)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_users:
+                self.entries.popitem(last = False)
+        return rows
+
+    def invalidate(self, user_ids = None):
+        with self.lock:
+            if user_ids is None:
+                self.entries.clear()
+            for user_id in user_ids or []:
+                self.entries.pop(user_id, None)
+
+    def search(self, user_id, prefix, limit = 10):
+        rows = self.get(user_id)
+        prefix = normalize(prefix)
+        start = bisect_left(rows, (prefix,))
+        matches = []
+        for row in rows[start:]:
+            if not row[0].startswith(prefix):
+                break
+            matches.append(row)
+        matches.sort(key = lambda row: (-row[2], row[0]))
+        return [{'name': name, 'count': count} for _, name, count in matches[:limit]]
+
+
+suggestion_index = SuggestionIndex(**getattr(settings, 'ITEM_SUGGESTION_INDEX', {}))
+
+
+@batch_task
+def record_items(basket_id, item_ids):
+    #Count new items for the basket owner and everyone the basket is shared with, one run per basket for a burst of adds
+    names = {}
+    for name in Item.objects.filter(pk__in = item_ids, basket_id = basket_id).values_list('name', flat = True):
+        key = normalize(name)
+        if key:
+            count, _ = names.get(key, (0, name))
+            names[key] = (count + 1, name)
+    basket = Basket.objects.filter(pk = basket_id).values_list('owner_id', flat = True).first()
+    if not names or basket is None:
+        return
+    user_ids = {basket, *Basket.shared_with.through.objects.filter(basket_id = basket_id).values_list('user_id', flat = True)}
+    with transaction.atomic():
+        for key, (count, name) in names.items():
+            existing = set(ItemSuggestion.objects
+                .filter(user_id__in = user_ids, name_key = key)
+                .values_list('user_id', flat = True))
+            ItemSuggestion.objects.filter(user_id__in = existing, name_key = key).update(count = F('count') + count, name = name)
+            ItemSuggestion.objects.bulk_create(
+                [ItemSuggestion(user_id = user_id, name_key = key, name = name, count = count) for user_id in user_ids - existing],
+                ignore_conflicts = True
+            )
+    suggestion_index.invalidate(user_ids)
+
+
+def rebuild(batch_size = 1000):
+    #Recount every user's suggestions from the items table
+    counts = {}
+    owned = Item.objects.values_list('basket__owner', 'name')
+    shared = Item.objects.filter(basket__shared_with__isnull = False).values_list('basket__shared_with', 'name')
+    for rows in (owned, shared):
+        for user_id, name in rows.iterator(chunk_size = batch_size):
+            key = normalize(name)
+            if not key:
+                continue
+            _, count = counts.get((user_id, key), (name, 0))
+            counts[(user_id, key)] = (name, count + 1)
+
+    with transaction.atomic():
+        ItemSuggestion.objects.all().delete()
+        ItemSuggestion.objects.bulk_create(
+            (ItemSuggestion(user_id = user_id, name_key = key, name = name, count = count)
+                for (user_id, key), (name, count) in counts.items()),
+            batch_size = batch_size
+        )
+    suggestion_index.invalidate()
+    return len(counts)
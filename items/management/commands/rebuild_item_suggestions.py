@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from items.autocomplete import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the item name autocomplete index from all items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type = int, default = 1000)
+
+    def handle(self, *args, **options):
+        total = rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} user/name pairs'))
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-19 16:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baskets', '0007_archivedbasket'),
+        ('items', '0002_item_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('active', 'active'), ('bought', 'bought'), ('ignored', 'ignored')], default='active', max_length=100)),
+                ('basket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_items', to='baskets.archivedbasket')),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items_archived', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-19 17:03
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+from utils.operations import PostgresAddIndexConcurrently, PostgresRunSQL, batched_update
+
+# Same trigger, backfill and GIN index as baskets migration 0008, for item names
+TRIGGER = """
+    CREATE TRIGGER item_search_vector_update
+    BEFORE INSERT OR UPDATE OF name ON items_item
+    FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(search_vector, 'pg_catalog.english', name)
+"""
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('items', '0004_itemsuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        PostgresRunSQL(TRIGGER, "DROP TRIGGER IF EXISTS item_search_vector_update ON items_item"),
+        batched_update('items_item', "search_vector = to_tsvector('pg_catalog.english', coalesce(name, ''))"),
+        PostgresAddIndexConcurrently(
+            model_name='item',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='item_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 6.0 on 2026-10-19 17:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def spaced_keys(count):
+    #Same as items.ordering.spaced_keys, copied so later changes there can't alter this migration
+    width = 1
+    while len(DIGITS) ** width <= count:
+        width += 1
+    step = len(DIGITS) ** width // (count + 1)
+    keys = []
+    for n in range(1, count + 1):
+        value, digits = n * step, []
+        for _ in range(width):
+            value, digit = divmod(value, len(DIGITS))
+            digits.append(DIGITS[digit])
+        keys.append(''.join(reversed(digits)).rstrip('0'))
+    return keys
+
+
+def number_model(model, db):
+    #order_by() keeps DISTINCT to one row per basket, whatever default ordering the model picks up
+    basket_ids = model.objects.using(db).order_by().values_list('basket_id', flat=True).distinct()
+    for basket_id in basket_ids.iterator():
+        items = list(model.objects.using(db).filter(basket_id=basket_id).order_by('id').only('id'))
+        for item, key in zip(items, spaced_keys(len(items))):
+            item.position = key
+        model.objects.using(db).bulk_update(items, ['position'], batch_size=500)
+
+
+def number_items(apps, schema_editor):
+    #Existing items, archived ones included so they restore in order, keep their creation order within each basket.
+    #Queries go to the migrating connection explicitly, the replica router would send the reads elsewhere
+    db = schema_editor.connection.alias
+    number_model(apps.get_model('items', 'Item'), db)
+    number_model(apps.get_model('items', 'ArchivedItem'), db)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baskets', '0010_storeaisle'),
+        ('items', '0005_item_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archiveditem',
+            name='position',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='position',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['basket', 'position', 'id'], name='item_basket_position'),
+        ),
+        migrations.RunPython(number_items, migrations.RunPython.noop),
+    ]
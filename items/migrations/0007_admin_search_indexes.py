@@ -0,0 +1,15 @@
+# Generated by Django 6.0 on 2026-10-19 17:12
+
+from django.db import migrations
+from utils.operations import upper_pattern_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0006_item_position'),
+    ]
+
+    operations = [
+        upper_pattern_index('item_name_upper_idx', 'items_item', 'name'),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 
 # Create your models here.
 class Item (models.Model):
@@ -32,3 +33,55 @@ class Item (models.Model):
         related_name =  'items_created'
     )
 
+    #Kept up to date from name by a Postgres trigger, see migration 0005
+    search_vector = SearchVectorField(null = True, editable = False)
+
+    #Fractional key, see items/ordering.py. Moving an item rewrites only this column of its own row
+    position = models.CharField(max_length = 255, default = '', editable = False)
+
+    class Meta:
+        #No default ordering, basket reads order by items.ordering.BASKET_ORDER themselves
+        indexes = [
+            models.Index(fields = ['basket', 'position', 'id'], name = 'item_basket_position')
+        ]
+
+
+#Cold storage for the items of an archived basket
+class ArchivedItem (models.Model):
+    id = models.BigIntegerField(primary_key = True) #keeps the original item id so it can be restored
+    name = models.CharField(max_length = 255)
+    position = models.CharField(max_length = 255, default = '')
+
+    status = models.CharField(
+        max_length = 100,
+        choices = Item.STATUS_CHOICES,
+        default = Item.ACTIVE
+    )
+
+    basket = models.ForeignKey(
+        to = 'baskets.ArchivedBasket',
+        on_delete = models.CASCADE,
+        related_name = 'archived_items'
+    )
+    creator = models.ForeignKey(
+        to = 'users.User',
+        on_delete = models.CASCADE,
+        related_name = 'items_archived'
+    )
+
+
+#How often each user has seen an item name in their own and shared baskets, read by the autocomplete endpoint
+class ItemSuggestion (models.Model):
+    user = models.ForeignKey(
+        to = 'users.User',
+        on_delete = models.CASCADE,
+        related_name = 'item_suggestions'
+    )
+    name_key = models.CharField(max_length = 255) #lowercased name, used for matching
+    name = models.CharField(max_length = 255) #last spelling used, shown to the user
+    count = models.PositiveIntegerField(default = 0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields = ['user', 'name_key'], name = 'unique_item_suggestion')
+        ]
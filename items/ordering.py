@@ -0,0 +1,111 @@
+"""
+Fractional positions for items within a basket.
+
+Positions are strings compared character by character (digits then lowercase
+letters, which sort the same in every database collation). There is always
+room for a new key between two others, so moving an item only rewrites that
+item's row. Keys never end in '0', which keeps that guarantee.
+"""
+
+from django.db import transaction
+from django.db.models import Prefetch
+from .models import Item, ArchivedItem
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+MAX_LENGTH = 50 #rebalance the basket once keys get this long
+BASKET_ORDER = ('position', 'id')
+
+
+def basket_items():
+    #Prefetch a basket's items in basket order, served by the (basket, position, id) index
+    return Prefetch('basket_items', queryset=Item.objects.order_by(*BASKET_ORDER))
+
+
+def archived_items():
+    return Prefetch('archived_items', queryset=ArchivedItem.objects.order_by(*BASKET_ORDER))
+
+
+def midpoint(a, b):
+    #A key strictly between a and b, where '' is the start and None is the end
+    if b is not None and a >= b:
+        raise ValueError(f'{a!r} is not before {b!r}')
+    if b is not None:
+        #Keep the common prefix, padding a with '0's
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else '0') == b[n]:
+            n += 1
+        if n:
+            return b[:n] + midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + midpoint(a[1:], None)
+
+
+def key_after(a):
+    #A key after a that stays short for repeated appends: bump the first digit that isn't 'z'
+    for n, char in enumerate(a):
+        if char != 'z':
+            return a[:n] + DIGITS[DIGITS.index(char) + 1]
+    return a + DIGITS[BASE // 2]
+
+
+def spaced_keys(count):
+    #count evenly spaced keys of equal length, used when (re)numbering a whole basket
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width // (count + 1)
+    keys = []
+    for n in range(1, count + 1):
+        value, digits = n * step, []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append(''.join(reversed(digits)).rstrip('0'))
+    return keys
+
+
+def next_position(basket_id):
+    #Position for a new item at the end of the basket, read from the (basket, position) index
+    last = Item.objects.filter(basket_id=basket_id).order_by('-position').values_list('position', flat=True).first()
+    position = key_after(last or '')
+    if len(position) > MAX_LENGTH:
+        rebalance(basket_id)
+        return next_position(basket_id)
+    return position
+
+
+@transaction.atomic
+def rebalance(basket_id):
+    items = list(Item.objects.select_for_update().filter(basket_id=basket_id).order_by(*BASKET_ORDER))
+    for item, key in zip(items, spaced_keys(len(items))):
+        item.position = key
+    Item.objects.bulk_update(items, ['position'], batch_size=500)
+
+
+def move(item, after=None, before=None):
+    """
+    Put item between the items `after` and `before` (either may be None for the start/end).
+    A single-row UPDATE, unless the neighbours' keys leave no room and the basket is renumbered first.
+    """
+    low = after.position if after else ''
+    high = before.position if before else None
+    try:
+        position = midpoint(low, high)
+    except ValueError:
+        position = None #duplicate or out-of-order neighbours
+    if position is None or len(position) > MAX_LENGTH:
+        rebalance(item.basket_id)
+        if after:
+            after.refresh_from_db(fields=['position'])
+        if before:
+            before.refresh_from_db(fields=['position'])
+        position = midpoint(after.position if after else '', before.position if before else None)
+    Item.objects.filter(pk=item.pk).update(position=position)
+    item.position = position
+    return item
@@ -0,0 +1,151 @@
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from baskets.models import Basket
+from baskets.serializers.common import BasketSerializer
+from utils.idempotency import run_once, fingerprint
+from .models import Item
+from .serializers.common import ItemSerializer
+
+REPLAY_PATH = '/items/replay/'
+
+
+class Conflict(Exception):
+    pass
+
+
+def allowed_baskets(user):
+    return Basket.objects.filter(Q(owner=user) | Q(shared_with=user)).distinct()
+
+
+def get_pk(mutation, field):
+    pk = mutation.get(field)
+    if isinstance(pk, str) and pk.isdigit():
+        pk = int(pk)
+    if not isinstance(pk, int) or isinstance(pk, bool):
+        raise ValidationError({field: 'Expected an id.'})
+    return pk
+
+
+def get_dict(mutation, field):
+    value = mutation.get(field) or {}
+    if not isinstance(value, dict):
+        raise ValidationError({field: 'Expected an object.'})
+    return value
+
+
+def get_basket(user, mutation):
+    try:
+        return allowed_baskets(user).get(pk=get_pk(mutation, 'basket'))
+    except Basket.DoesNotExist:
+        raise Conflict('Basket is no longer available')
+
+
+def get_item(user, mutation):
+    try:
+        return Item.objects.get(pk=get_pk(mutation, 'item'), basket__in=allowed_baskets(user))
+    except Item.DoesNotExist:
+        raise Conflict('Item is no longer available')
+
+
+def check_expected(current, mutation):
+    """
+    The client sends the values it last saw, anything changed on the server since then is a conflict.
+    Compared against the serialized instance, so relations are ids and dates are strings, as the client has them.
+    """
+    changed = {
+        field: current[field]
+        for field, value in get_dict(mutation, 'expected').items()
+        if field in current and current[field] != value
+    }
+    if changed:
+        raise Conflict({'current': changed})
+
+
+def create_item(user, mutation):
+    basket = get_basket(user, mutation)
+    data = {**get_dict(mutation, 'data'), 'basket': basket.id, 'creator': user.id}
+    serializer = ItemSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return 201, serializer.data
+
+
+def update_item(user, mutation):
+    item = get_item(user, mutation)
+    check_expected(ItemSerializer(item).data, mutation)
+    serializer = ItemSerializer(item, data=get_dict(mutation, 'data'), partial=True)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return 200, serializer.data
+
+
+def delete_item(user, mutation):
+    item = get_item(user, mutation)
+    check_expected(ItemSerializer(item).data, mutation)
+    item.delete()
+    return 204, None
+
+
+def update_basket(user, mutation):
+    basket = get_basket(user, mutation)
+    check_expected(BasketSerializer(basket).data, mutation)
+    serializer = BasketSerializer(basket, data=get_dict(mutation, 'data'), partial=True)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return 200, serializer.data
+
+
+OPERATIONS = {
+    'create_item': create_item,
+    'update_item': update_item,
+    'delete_item': delete_item,
+    'update_basket': update_basket,
+}
+
+
+def invalid(detail):
+    return {'result': 'error', 'status': 400, 'data': {'detail': detail}, 'replayed': False}
+
+
+def apply_mutation(user, mutation):
+    if not isinstance(mutation, dict):
+        return invalid('Expected a mutation object.')
+    op = mutation.get('op')
+    operation = OPERATIONS.get(op) if isinstance(op, str) else None
+    if operation is None:
+        return invalid(f'Unknown op {op!r}')
+
+    def call():
+        try:
+            with transaction.atomic():
+                return operation(user, mutation)
+        except Conflict as conflict:
+            return 409, {'detail': conflict.args[0]}
+        except ValidationError as error:
+            return 400, error.detail
+
+    key = mutation.get('idempotency_key')
+    if key is not None and not isinstance(key, str):
+        return invalid('idempotency_key must be a string.')
+    if key:
+        status, data, replayed = run_once(user.id, 'REPLAY', REPLAY_PATH, key, call, fingerprint(mutation))
+    else:
+        (status, data), replayed = call(), False
+
+    if status == 409:
+        result = 'conflict'
+    elif status >= 400:
+        result = 'error'
+    else:
+        result = 'applied'
+    return {'result': result, 'status': status, 'data': data, 'replayed': replayed}
+
+
+def replay(user, mutations):
+    #Apply queued offline mutations in the order the client made them, one result per mutation
+    results = []
+    for mutation in mutations:
+        mutation_id = mutation.get('id') if isinstance(mutation, dict) else None
+        results.append({'id': mutation_id, **apply_mutation(user, mutation)})
+    return results
@@ -1,7 +1,12 @@
 from rest_framework.serializers import ModelSerializer
-from ..models import Item
+from ..models import Item, ArchivedItem
 
 class ItemSerializer (ModelSerializer):
     class Meta: 
         model = Item
-        fields = '__all__'
\ No newline at end of file
+        exclude = ['search_vector']
+
+class ArchivedItemSerializer (ModelSerializer):
+    class Meta:
+        model = ArchivedItem
+        fields = '__all__'
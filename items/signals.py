@@ -0,0 +1,18 @@
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
+from .models import Item
+from .autocomplete import record_items
+from .ordering import next_position
+
+
+@receiver(pre_save, sender = Item)
+def append_to_basket(sender, instance, **kwargs):
+    #New items go to the end of their basket
+    if not instance.position:
+        instance.position = next_position(instance.basket_id)
+
+
+@receiver(post_save, sender = Item)
+def update_suggestions(sender, instance, created, **kwargs):
+    if created:
+        record_items.defer(instance.basket_id, value = instance.pk, key = f'basket:{instance.basket_id}')
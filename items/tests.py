@@ -1,3 +1,262 @@
-from django.test import TestCase
+import random
+from django.core.cache import cache
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from baskets.models import Basket, StoreAisle
+from users.models import User
+from utils.purge import soft_delete
+from .autocomplete import SuggestionIndex, rebuild, suggestion_index
+from .models import Item, ItemSuggestion
+from .ordering import BASKET_ORDER, MAX_LENGTH, key_after, midpoint, move, rebalance, spaced_keys
 
-# Create your tests here.
+
+class MidpointTests(SimpleTestCase):
+    def test_between_two_keys(self):
+        for low, high in [('', None), ('', 'i'), ('i', None), ('a', 'b'), ('a', 'a1'), ('az', 'b'), ('1', '2'), ('zz', None)]:
+            key = midpoint(low, high)
+            self.assertLess(low, key)
+            if high is not None:
+                self.assertLess(key, high)
+            self.assertFalse(key.endswith('0'))
+
+    def test_rejects_out_of_order_neighbours(self):
+        with self.assertRaises(ValueError):
+            midpoint('b', 'a')
+        with self.assertRaises(ValueError):
+            midpoint('a', 'a')
+
+    def test_repeated_inserts_keep_order(self):
+        keys = ['', None]
+        rng = random.Random(0)
+        for _ in range(500):
+            n = rng.randrange(len(keys) - 1)
+            keys.insert(n + 1, midpoint(keys[n], keys[n + 1]))
+        inner = keys[1:-1]
+        self.assertEqual(inner, sorted(inner))
+        self.assertEqual(len(set(inner)), len(inner))
+
+    def test_front_inserts_grow_slowly(self):
+        key = 'i'
+        for _ in range(100):
+            key = midpoint('', key)
+        self.assertLessEqual(len(key), MAX_LENGTH)
+
+
+class KeyAfterTests(SimpleTestCase):
+    def test_appends_stay_sorted_and_under_the_rebalance_length(self):
+        keys = ['']
+        for _ in range(500):
+            keys.append(key_after(keys[-1]))
+        self.assertEqual(keys, sorted(keys))
+        self.assertLessEqual(max(len(key) for key in keys), MAX_LENGTH)
+
+    def test_after_all_z(self):
+        self.assertGreater(key_after('zz'), 'zz')
+
+
+class SpacedKeysTests(SimpleTestCase):
+    def test_sorted_unique_and_trimmed(self):
+        for count in (1, 2, 35, 36, 1000):
+            keys = spaced_keys(count)
+            self.assertEqual(len(keys), count)
+            self.assertEqual(keys, sorted(set(keys)))
+            self.assertFalse(any(key.endswith('0') or not key for key in keys))
+
+
+class BasketOrderTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username = 'alice', email = 'alice@x.com', password = 'pw')
+        self.basket = Basket.objects.create(name = 'weekly', store = 'Tesco', owner = self.owner)
+        self.items = [Item.objects.create(name = name, basket = self.basket, creator = self.owner) for name in ('Milk', 'Eggs', 'Bread')]
+
+    def names(self):
+        return list(Item.objects.filter(basket = self.basket).order_by(*BASKET_ORDER).values_list('name', flat = True))
+
+    def test_new_items_are_appended(self):
+        self.assertEqual(self.names(), ['Milk', 'Eggs', 'Bread'])
+
+    def test_move_between_neighbours(self):
+        milk, eggs, bread = self.items
+        move(bread, after = milk, before = eggs)
+        self.assertEqual(self.names(), ['Milk', 'Bread', 'Eggs'])
+        move(milk, after = eggs)
+        self.assertEqual(self.names(), ['Bread', 'Eggs', 'Milk'])
+
+    def test_move_with_clashing_neighbours_rebalances(self):
+        milk, eggs, bread = self.items
+        Item.objects.filter(pk__in = [milk.pk, eggs.pk]).update(position = 'i')
+        milk.refresh_from_db()
+        eggs.refresh_from_db()
+        move(bread, after = milk, before = eggs)
+        self.assertEqual(self.names(), ['Milk', 'Bread', 'Eggs'])
+
+    def test_rebalance_keeps_order(self):
+        milk, eggs, bread = self.items
+        Item.objects.filter(pk = milk.pk).update(position = 'z' * MAX_LENGTH)
+        rebalance(self.basket.pk)
+        self.assertEqual(self.names(), ['Eggs', 'Bread', 'Milk'])
+        self.assertTrue(all(len(position) == 1 for position in Item.objects.values_list('position', flat = True)))
+
+    def test_aisle_order_matches_normalized_names(self):
+        Item.objects.filter(pk = self.items[2].pk).update(name = '  Bread   rolls ')
+        StoreAisle.objects.create(owner = self.owner, store = 'Tesco', name_key = 'bread rolls', aisle = 1)
+        StoreAisle.objects.create(owner = self.owner, store = 'Tesco', name_key = 'eggs', aisle = 2)
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get(f'/baskets/{self.basket.pk}/items/', {'order': 'aisle'})
+        self.assertEqual([item['name'] for item in response.data], ['  Bread   rolls ', 'Eggs', 'Milk'])
+
+
+class DeletedBasketItemTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username = 'alice', email = 'alice@x.com', password = 'pw')
+        basket = Basket.objects.create(name = 'weekly', store = 'Tesco', owner = self.owner)
+        self.item = Item.objects.create(name = 'Milk', basket = basket, creator = self.owner)
+        soft_delete(basket)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_items_of_a_deleted_basket_are_gone(self):
+        self.assertEqual(self.client.get(f'/items/{self.item.pk}/').status_code, 404)
+        self.assertEqual(self.client.put(f'/items/{self.item.pk}/', {'name': 'Oat milk'}, format = 'json').status_code, 404)
+        self.assertEqual(self.client.post(f'/items/{self.item.pk}/move/', {}, format = 'json').status_code, 404)
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username = 'alice', email = 'alice@x.com', password = 'pw')
+        self.basket = Basket.objects.create(name = 'weekly', owner = self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def post(self, body, key = 'key-1'):
+        return self.client.post(f'/baskets/{self.basket.pk}/items/', body, format = 'json', HTTP_IDEMPOTENCY_KEY = key)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.post({'name': 'Milk'})
+        retry = self.post({'name': 'Milk'})
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Item.objects.count(), 1)
+
+    def test_key_reused_with_a_different_payload_is_refused(self):
+        self.post({'name': 'Milk'})
+        self.assertEqual(self.post({'name': 'Eggs'}).status_code, 422)
+        self.assertEqual(list(Item.objects.values_list('name', flat = True)), ['Milk'])
+
+    def test_keys_are_independent(self):
+        self.post({'name': 'Milk'})
+        self.post({'name': 'Milk'}, key = 'key-2')
+        self.assertEqual(Item.objects.count(), 2)
+
+    def test_failed_requests_are_not_stored(self):
+        self.assertEqual(self.post({}).status_code, 400)
+        self.assertEqual(self.post({}).status_code, 400)
+        self.assertFalse(self.post({}).has_header('Idempotent-Replayed'))
+
+
+class ReplayTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username = 'alice', email = 'alice@x.com', password = 'pw')
+        self.basket = Basket.objects.create(name = 'weekly', owner = self.owner)
+        self.item = Item.objects.create(name = 'Milk', basket = self.basket, creator = self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def replay(self, *mutations):
+        response = self.client.post('/items/replay/', {'mutations': list(mutations)}, format = 'json')
+        self.assertEqual(response.status_code, 200)
+        return [(result['id'], result['result'], result['status']) for result in response.data['results']]
+
+    def test_applies_mutations_in_order(self):
+        results = self.replay(
+            {'id': 1, 'op': 'create_item', 'basket': self.basket.pk, 'data': {'name': 'Eggs'}},
+            {'id': 2, 'op': 'update_item', 'item': self.item.pk, 'expected': {'name': 'Milk'}, 'data': {'name': 'Oat milk'}},
+            {'id': 3, 'op': 'update_basket', 'basket': str(self.basket.pk), 'data': {'store': 'Tesco'}},
+        )
+        self.assertEqual(results, [(1, 'applied', 201), (2, 'applied', 200), (3, 'applied', 200)])
+        self.assertEqual(sorted(Item.objects.values_list('name', flat = True)), ['Eggs', 'Oat milk'])
+
+    def test_changes_made_since_the_client_last_saw_them_conflict(self):
+        Item.objects.filter(pk = self.item.pk).update(name = 'Soy milk')
+        mutation = {'id': 1, 'op': 'delete_item', 'item': self.item.pk, 'expected': {'name': 'Milk', 'basket': self.basket.pk}}
+        self.assertEqual(self.replay(mutation), [(1, 'conflict', 409)])
+        self.assertTrue(Item.objects.filter(pk = self.item.pk).exists())
+
+    def test_other_users_baskets_conflict(self):
+        bob = User.objects.create_user(username = 'bob', email = 'bob@x.com', password = 'pw')
+        theirs = Basket.objects.create(name = 'theirs', owner = bob)
+        self.assertEqual(self.replay({'id': 1, 'op': 'create_item', 'basket': theirs.pk, 'data': {'name': 'Eggs'}}), [(1, 'conflict', 409)])
+
+    def test_malformed_mutations_get_their_own_error(self):
+        results = self.replay(
+            'not a mutation',
+            {'id': 2, 'op': 'drop_table'},
+            {'id': 3, 'op': 'update_item', 'item': True},
+            {'id': 4, 'op': 'update_item', 'item': self.item.pk, 'data': ['Eggs']},
+            {'id': 5, 'op': 'create_item', 'basket': self.basket.pk, 'data': {'name': 'Eggs'}, 'idempotency_key': 5},
+        )
+        self.assertEqual(results, [(None, 'error', 400), (2, 'error', 400), (3, 'error', 400), (4, 'error', 400), (5, 'error', 400)])
+
+    def test_idempotency_keys_replay_instead_of_applying_twice(self):
+        mutation = {'id': 1, 'op': 'create_item', 'basket': self.basket.pk, 'data': {'name': 'Eggs'}, 'idempotency_key': 'offline-1'}
+        self.replay(mutation)
+        response = self.client.post('/items/replay/', {'mutations': [mutation]}, format = 'json')
+        self.assertTrue(response.data['results'][0]['replayed'])
+        self.assertEqual(Item.objects.filter(name = 'Eggs').count(), 1)
+        changed = {**mutation, 'data': {'name': 'Bread'}}
+        self.assertEqual(self.replay(changed), [(1, 'error', 422)])
+
+
+@override_settings(TASKS = {**settings.TASKS, 'EAGER': True})
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        suggestion_index.invalidate()
+        self.alice, self.bob = [User.objects.create_user(username = name, email = f'{name}@x.com', password = 'pw') for name in ('alice', 'bob')]
+        self.basket = Basket.objects.create(name = 'weekly', owner = self.alice)
+        self.basket.shared_with.add(self.bob)
+        with self.captureOnCommitCallbacks(execute = True):
+            for name in ('Milk', ' milk ', 'Mild cheddar', 'Eggs'):
+                Item.objects.create(name = name, basket = self.basket, creator = self.alice)
+
+    def suggest(self, user, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/items/autocomplete/', params)
+        self.assertEqual(response.status_code, 200)
+        return [(hit['name'], hit['count']) for hit in response.data]
+
+    def test_most_used_names_first_for_every_member(self):
+        self.assertEqual(self.suggest(self.alice, q = 'MI'), [(' milk ', 2), ('Mild cheddar', 1)])
+        self.assertEqual(self.suggest(self.bob, q = 'mil'), [(' milk ', 2), ('Mild cheddar', 1)])
+        self.assertEqual(self.suggest(self.alice, q = 'x'), [])
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(len(self.suggest(self.alice, q = 'mi', limit = 0)), 1)
+        self.assertEqual(len(self.suggest(self.alice, q = 'mi', limit = -5)), 1)
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        self.assertEqual(client.get('/items/autocomplete/', {'limit': 'ten'}).status_code, 400)
+
+    def test_new_items_show_up_straight_away(self):
+        self.suggest(self.alice, q = 'e') #cached in this process
+        with self.captureOnCommitCallbacks(execute = True):
+            Item.objects.create(name = 'Eggs', basket = self.basket, creator = self.alice)
+        self.assertEqual(self.suggest(self.alice, q = 'e'), [('Eggs', 2)])
+
+    def test_rebuild_matches_incremental_counts(self):
+        counts = set(ItemSuggestion.objects.values_list('user_id', 'name_key', 'count'))
+        rebuild()
+        self.assertEqual(set(ItemSuggestion.objects.values_list('user_id', 'name_key', 'count')), counts)
+
+
+class SuggestionIndexTests(TestCase):
+    def test_least_recently_used_users_are_dropped(self):
+        index = SuggestionIndex(max_users = 2)
+        for user_id in (1, 2, 1, 3):
+            index.get(user_id)
+        self.assertEqual(list(index.entries), [1, 3])
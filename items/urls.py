@@ -1,6 +1,9 @@
 from django.urls import path 
-from .views import ItemsView, ItemsDetaiView
+from .views import ItemsView, ItemsDetaiView, ReplayView, ItemSuggestionView, ItemMoveView
 
 urlpatterns = [
-    path('<int:pk>/', ItemsDetaiView.as_view())
+    path('<int:pk>/', ItemsDetaiView.as_view()),
+    path('replay/', ReplayView.as_view()),
+    path('autocomplete/', ItemSuggestionView.as_view()),
+    path('<int:pk>/move/', ItemMoveView.as_view())
 ]
\ No newline at end of file
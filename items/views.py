@@ -1,12 +1,16 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from baskets.models import Basket
+from baskets.models import Basket, StoreAisle
 from items.serializers.populated import PopulatedItemSerializer
 from .models import Item
 from .serializers.common import ItemSerializer
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from utils.permissions import HasBasketPermission, HasItemPermission
+from utils.idempotency import idempotent
+from .replay import replay
+from .autocomplete import suggestion_index, normalize
+from .ordering import move, BASKET_ORDER
 
 # Create your views here.
 class ItemsView(APIView): 
@@ -18,13 +22,23 @@ class ItemsView(APIView):
         except: 
             raise NotFound
 
-    #Index all the items of a specific basket
+    #Index all the items of a specific basket, in basket order or with ?order=aisle by the owner's aisle map for the store
     def get (self, request ,pk): 
-        items = Item.objects.filter(basket=pk)
+        items = Item.objects.filter(basket=pk).order_by(*BASKET_ORDER)
+        if request.query_params.get('order') == 'aisle':
+            basket = self.get_basket(pk)
+            items = list(items)
+            #Aisle keys are normalize()d names, which SQL can't reproduce, so match them up here
+            aisles = dict(StoreAisle.objects
+                .filter(owner=basket.owner_id, store=basket.store, name_key__in={normalize(item.name) for item in items})
+                .values_list('name_key', 'aisle'))
+            unmapped = float('inf')
+            items.sort(key=lambda item: aisles.get(normalize(item.name), unmapped)) #stable, so basket order within an aisle
         serializer= ItemSerializer(items, many = True)  
         return Response (serializer.data)
 
     #Create a new item
+    @idempotent
     def post (self, request, pk):   
         request.data['basket'] =  basket =  self.get_basket(pk).id
         request.data['creator'] = request.user.id
@@ -38,7 +52,7 @@ class ItemsDetaiView(APIView):
     
     def get_item (self, pk):
         try:
-            return Item.objects.get(pk=pk)
+            return Item.objects.get(pk=pk, basket__deleted_at__isnull=True)
         except Item.DoesNotExist:
             raise NotFound(detail = 'Item is no longer available')
 
@@ -49,6 +63,7 @@ class ItemsDetaiView(APIView):
         return Response(serializer.data ) 
 
     #Edit a single item
+    @idempotent
     def put (self, request, pk):
         item = self.get_item (pk)
         serializer = ItemSerializer (item, data=request.data, partial = True)
@@ -57,7 +72,56 @@ class ItemsDetaiView(APIView):
         return Response (serializer.data)
 
     #Delete a single item
+    @idempotent
     def delete (self, request, pk):
         item = self.get_item(pk)
         item.delete()
-        return Response (status = 204)
\ No newline at end of file
+        return Response (status = 204)
+
+class ReplayView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    #Apply a queue of mutations made while the client was offline
+    def post (self, request):
+        mutations = request.data.get('mutations') if isinstance(request.data, dict) else None
+        if not isinstance(mutations, list):
+            raise ValidationError({'mutations': 'Expected a list of mutations.'})
+        return Response ({'results': replay(request.user, mutations)})
+
+
+class ItemSuggestionView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    #Suggest item names the user has seen before, most used first
+    def get (self, request):
+        prefix = request.query_params.get('q', '')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            raise ValidationError({'limit': 'Expected a number.'})
+        return Response (suggestion_index.search(request.user.id, prefix, limit))
+
+
+class ItemMoveView(APIView):
+    permission_classes = [IsAuthenticated, HasItemPermission]
+
+    def get_neighbour (self, item, pk):
+        if pk is None:
+            return None
+        try:
+            return Item.objects.get(pk=pk, basket=item.basket_id)
+        except Item.DoesNotExist:
+            raise ValidationError({'detail': f'Item {pk} is not in this basket.'})
+
+    #Move an item between two others: {"after": <item id or null>, "before": <item id or null>}
+    def post (self, request, pk):
+        try:
+            item = Item.objects.get(pk=pk, basket__deleted_at__isnull=True)
+        except Item.DoesNotExist:
+            raise NotFound(detail = 'Item is no longer available')
+        after = self.get_neighbour(item, request.data.get('after'))
+        before = self.get_neighbour(item, request.data.get('before'))
+        if after and before and (after.position, after.id) >= (before.position, before.id):
+            raise ValidationError({'detail': '"after" must come before "before".'})
+        move(item, after, before)
+        return Response (ItemSerializer(item).data)
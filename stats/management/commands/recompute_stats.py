@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from stats.rollups import recompute
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the household statistics rollups from the live and archived baskets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type = int, default = 1000)
+
+    def handle(self, *args, **options):
+        total = recompute(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} rollup rows'))
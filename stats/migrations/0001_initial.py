@@ -0,0 +1,58 @@
+# Generated by Django 6.0 on 2026-10-19 17:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemPurchaseStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name_key', models.CharField(max_length=255)),
+                ('name', models.CharField(max_length=255)),
+                ('bought_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_purchase_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-bought_count'], name='item_purchase_stat_top')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'name_key'), name='unique_item_purchase_stat')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StoreVisitStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('store', models.CharField(max_length=255)),
+                ('visit_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='store_visit_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-visit_count'], name='store_visit_stat_top')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'store'), name='unique_store_visit_stat')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WeeklyBasketStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField()),
+                ('completed_count', models.IntegerField(default=0)),
+                ('timed_count', models.IntegerField(default=0)),
+                ('completion_seconds', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_basket_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'week'), name='unique_weekly_basket_stat')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import models
+
+# Rollups behind the household dashboard. Every member of a basket (owner and
+# shared_with) gets the basket's contribution, so each user reads only their own rows.
+
+#How many times each item name was bought
+class ItemPurchaseStat(models.Model):
+    user = models.ForeignKey(
+        to = 'users.User',
+        on_delete = models.CASCADE,
+        related_name = 'item_purchase_stats'
+    )
+    name_key = models.CharField(max_length = 255) #lowercased name
+    name = models.CharField(max_length = 255)
+    bought_count = models.IntegerField(default = 0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields = ['user', 'name_key'], name = 'unique_item_purchase_stat')
+        ]
+        indexes = [
+            models.Index(fields = ['user', '-bought_count'], name = 'item_purchase_stat_top')
+        ]
+
+
+#Baskets completed per week, and how long they took from creation to completion
+class WeeklyBasketStat(models.Model):
+    user = models.ForeignKey(
+        to = 'users.User',
+        on_delete = models.CASCADE,
+        related_name = 'weekly_basket_stats'
+    )
+    week = models.DateField() #Monday of the week
+    completed_count = models.IntegerField(default = 0)
+    timed_count = models.IntegerField(default = 0) #baskets completed after completed_at existed
+    completion_seconds = models.BigIntegerField(default = 0) #summed over the timed baskets
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields = ['user', 'week'], name = 'unique_weekly_basket_stat')
+        ]
+
+
+#Completed baskets per store
+class StoreVisitStat(models.Model):
+    user = models.ForeignKey(
+        to = 'users.User',
+        on_delete = models.CASCADE,
+        related_name = 'store_visit_stats'
+    )
+    store = models.CharField(max_length = 255)
+    visit_count = models.IntegerField(default = 0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields = ['user', 'store'], name = 'unique_store_visit_stat')
+        ]
+        indexes = [
+            models.Index(fields = ['user', '-visit_count'], name = 'store_visit_stat_top')
+        ]
@@ -0,0 +1,147 @@
+from collections import Counter
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from baskets.models import Basket, ArchivedBasket
+from items.models import Item, ArchivedItem
+from items.autocomplete import normalize
+from tasks.queue import batch_task
+from .models import ItemPurchaseStat, WeeklyBasketStat, StoreVisitStat
+
+
+def week_of(moment):
+    day = moment.date()
+    return day - timedelta(days = day.weekday())
+
+
+def bump(model, lookup, defaults, **increments):
+    #Add to counters of one rollup row, creating it when missing
+    updated = model.objects.filter(**lookup).update(**{field: F(field) + value for field, value in increments.items()}, **defaults)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults, **increments)
+    except IntegrityError:
+        #Created by a concurrent update in the meantime
+        model.objects.filter(**lookup).update(**{field: F(field) + value for field, value in increments.items()}, **defaults)
+
+
+def members(basket_id):
+    basket = Basket.all_objects.filter(pk = basket_id).values_list('owner_id', flat = True).first()
+    if basket is None:
+        return set()
+    return {basket, *Basket.shared_with.through.objects.filter(basket_id = basket_id).values_list('user_id', flat = True)}
+
+
+@batch_task
+def record_purchases(basket_id, changes):
+    #[name, sign] per item of the basket that became bought (1) or stopped being bought (-1)
+    totals, names = Counter(), {}
+    for name, sign in changes:
+        key = normalize(name)
+        if key:
+            totals[key] += sign
+            names[key] = name
+    totals = {key: total for key, total in totals.items() if total}
+    if not totals:
+        return
+    for user_id in members(basket_id):
+        for key, total in totals.items():
+            bump(ItemPurchaseStat, {'user_id': user_id, 'name_key': key}, {'name': names[key]}, bought_count = total)
+
+
+@batch_task
+def record_completions(basket_id, changes):
+    """
+    [store, week, seconds, sign] per time the basket became Completed (1) or stopped being Completed (-1).
+    week is an ISO date, seconds is None for baskets completed before completed_at existed.
+    """
+    weekly, stores = {}, Counter()
+    for store, week, seconds, sign in changes:
+        entry = weekly.setdefault(week, [0, 0, 0])
+        entry[0] += sign
+        if seconds is not None:
+            entry[1] += sign
+            entry[2] += sign * seconds
+        if store:
+            stores[store] += sign
+    for user_id in members(basket_id):
+        for week, (completed, timed, seconds) in weekly.items():
+            if completed or timed or seconds:
+                bump(WeeklyBasketStat, {'user_id': user_id, 'week': week}, {},
+                     completed_count = completed, timed_count = timed, completion_seconds = seconds)
+        for store, visits in stores.items():
+            if visits:
+                bump(StoreVisitStat, {'user_id': user_id, 'store': store}, {}, visit_count = visits)
+
+
+def completion_of(created_at, completed_at):
+    #(week, seconds) a completed basket contributes
+    week = week_of(completed_at or created_at)
+    seconds = int((completed_at - created_at).total_seconds()) if completed_at else None
+    return week.isoformat(), seconds
+
+
+def recompute(batch_size = 1000):
+    #Rebuild every rollup from the live and archived baskets and items
+    purchases, names, weekly, stores = Counter(), {}, {}, Counter()
+
+    def basket_members(through, field, basket_ids, owners):
+        result = {basket_id: {owners[basket_id]} for basket_id in basket_ids}
+        for basket_id, user_id in through.objects.filter(**{f'{field}__in': basket_ids}).values_list(field, 'user_id'):
+            result[basket_id].add(user_id)
+        return result
+
+    sources = [
+        (Basket.objects, Basket.shared_with.through, 'basket_id', Item.objects),
+        (ArchivedBasket.objects, ArchivedBasket.shared_with.through, 'archivedbasket_id', ArchivedItem.objects),
+    ]
+    for baskets, through, field, items in sources:
+        rows = baskets.order_by('pk').values_list('pk', 'owner_id', 'status', 'store', 'created_at', 'completed_at')
+        for start in range(0, rows.count(), batch_size):
+            batch = list(rows[start:start + batch_size])
+            owners = {row[0]: row[1] for row in batch}
+            people = basket_members(through, field, list(owners), owners)
+
+            for basket_id, _, status, store, created_at, completed_at in batch:
+                if status != Basket.COMPLETED:
+                    continue
+                week, seconds = completion_of(created_at, completed_at)
+                for user_id in people[basket_id]:
+                    entry = weekly.setdefault((user_id, week), [0, 0, 0])
+                    entry[0] += 1
+                    if seconds is not None:
+                        entry[1] += 1
+                        entry[2] += seconds
+                    if store:
+                        stores[(user_id, store)] += 1
+
+            bought = items.filter(basket_id__in = list(owners), status = Item.BOUGHT).values_list('basket_id', 'name')
+            for basket_id, name in bought:
+                key = normalize(name)
+                if not key:
+                    continue
+                for user_id in people[basket_id]:
+                    purchases[(user_id, key)] += 1
+                    names[(user_id, key)] = name
+
+    with transaction.atomic():
+        ItemPurchaseStat.objects.all().delete()
+        WeeklyBasketStat.objects.all().delete()
+        StoreVisitStat.objects.all().delete()
+        ItemPurchaseStat.objects.bulk_create(
+            (ItemPurchaseStat(user_id = user_id, name_key = key, name = names[(user_id, key)], bought_count = count)
+                for (user_id, key), count in purchases.items()),
+            batch_size = batch_size
+        )
+        WeeklyBasketStat.objects.bulk_create(
+            (WeeklyBasketStat(user_id = user_id, week = week, completed_count = completed, timed_count = timed, completion_seconds = seconds)
+                for (user_id, week), (completed, timed, seconds) in weekly.items()),
+            batch_size = batch_size
+        )
+        StoreVisitStat.objects.bulk_create(
+            (StoreVisitStat(user_id = user_id, store = store, visit_count = count) for (user_id, store), count in stores.items()),
+            batch_size = batch_size
+        )
+    return len(purchases) + len(weekly) + len(stores)
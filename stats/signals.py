@@ -0,0 +1,94 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from baskets.models import Basket
+from items.models import Item
+from .rollups import record_completions, record_purchases, completion_of
+
+# Keep the rollups in step with basket and item writes. The deltas are applied
+# in the task pool after commit, batched per basket, so the request never touches the stats tables.
+
+
+def completion_changed(basket_id, store, week, seconds, sign):
+    record_completions.defer(basket_id, value = [store, week, seconds, sign], key = f'basket:{basket_id}')
+
+
+def purchase_changed(basket_id, name, sign):
+    record_purchases.defer(basket_id, value = [name, sign], key = f'basket:{basket_id}')
+
+
+def tracked(update_fields, *fields):
+    return update_fields is None or any(field in update_fields for field in fields)
+
+
+@receiver(pre_save, sender = Basket)
+def stamp_completion(sender, instance, update_fields = None, **kwargs):
+    if not tracked(update_fields, 'status', 'store'):
+        return
+    previous = None
+    if instance.pk is not None:
+        previous = (Basket.all_objects
+            .filter(pk = instance.pk)
+            .values('status', 'store', 'created_at', 'completed_at')
+            .first())
+    was_completed = bool(previous) and previous['status'] == Basket.COMPLETED
+    is_completed = instance.status == Basket.COMPLETED
+    if is_completed and not was_completed:
+        instance.completed_at = timezone.now()
+    elif was_completed and not is_completed:
+        instance.completed_at = None
+    instance._stats_before = previous
+
+
+@receiver(post_save, sender = Basket)
+def update_completion_stats(sender, instance, **kwargs):
+    if not hasattr(instance, '_stats_before'):
+        return
+    previous = instance._stats_before
+    del instance._stats_before
+    if previous is not None and previous['status'] == Basket.COMPLETED:
+        if instance.status == Basket.COMPLETED and previous['store'] == instance.store:
+            return
+        week, seconds = completion_of(previous['created_at'], previous['completed_at'])
+        completion_changed(instance.pk, previous['store'], week, seconds, -1)
+    if instance.status == Basket.COMPLETED:
+        if previous is not None and previous['status'] == Basket.COMPLETED:
+            #Store changed on a completed basket, keep the original completion time
+            instance.completed_at = previous['completed_at']
+        week, seconds = completion_of(instance.created_at, instance.completed_at)
+        completion_changed(instance.pk, instance.store, week, seconds, 1)
+
+
+@receiver(pre_save, sender = Item)
+def remember_bought(sender, instance, update_fields = None, **kwargs):
+    if not tracked(update_fields, 'status', 'name'):
+        return
+    instance._bought_before = None
+    if instance.pk is not None:
+        instance._bought_before = (Item.objects
+            .filter(pk = instance.pk, status = Item.BOUGHT)
+            .values_list('name', flat = True)
+            .first())
+
+
+@receiver(post_save, sender = Item)
+def update_purchase_stats(sender, instance, **kwargs):
+    if not hasattr(instance, '_bought_before'):
+        return
+    before = instance._bought_before
+    del instance._bought_before
+    after = instance.name if instance.status == Item.BOUGHT else None
+    if before == after:
+        return
+    if before is not None:
+        purchase_changed(instance.basket_id, before, -1)
+    if after is not None:
+        purchase_changed(instance.basket_id, after, 1)
+
+
+@receiver(post_delete, sender = Item)
+def forget_purchase(sender, instance, origin = None, **kwargs):
+    #Only single item deletes count. Bulk deletes are the archive moving rows out (still counted there)
+    #and basket cascades, whose members can't be looked up any more; recompute_stats settles those
+    if isinstance(origin, Item) and instance.status == Item.BOUGHT:
+        purchase_changed(instance.basket_id, instance.name, -1)
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+from baskets.models import Basket
+from items.models import Item
+from users.models import User
+from .models import ItemPurchaseStat, StoreVisitStat, WeeklyBasketStat
+from .rollups import recompute, record_completions
+
+
+def snapshot():
+    #Every rollup row, comparable between the incremental updates and recompute()
+    return (
+        set(ItemPurchaseStat.objects.values_list('user_id', 'name_key', 'bought_count')),
+        set(WeeklyBasketStat.objects.values_list('user_id', 'week', 'completed_count', 'timed_count', 'completion_seconds')),
+        set(StoreVisitStat.objects.values_list('user_id', 'store', 'visit_count')),
+    )
+
+
+@override_settings(TASKS = {**settings.TASKS, 'EAGER': True})
+class RollupTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = [User.objects.create_user(username = name, email = f'{name}@x.com', password = 'pw') for name in ('alice', 'bob')]
+        self.basket = Basket.objects.create(name = 'weekly', store = 'Tesco', owner = self.alice)
+        self.basket.shared_with.add(self.bob)
+
+    def save(self, obj, **fields):
+        #Run the after-commit rollup tasks like a request would
+        with self.captureOnCommitCallbacks(execute = True):
+            for field, value in fields.items():
+                setattr(obj, field, value)
+            obj.save(update_fields = list(fields))
+
+    def visits(self):
+        return dict(StoreVisitStat.objects.filter(user = self.bob).values_list('store', 'visit_count'))
+
+    def test_status_saves_keep_the_completion_time(self):
+        self.save(self.basket, status = Basket.COMPLETED)
+        self.basket.refresh_from_db()
+        self.assertIsNotNone(self.basket.completed_at)
+        self.save(self.basket, status = Basket.OPEN)
+        self.basket.refresh_from_db()
+        self.assertIsNone(self.basket.completed_at)
+
+    def test_completions_count_for_every_member_and_reopening_undoes_them(self):
+        self.save(self.basket, status = Basket.COMPLETED)
+        self.assertEqual(WeeklyBasketStat.objects.filter(completed_count = 1, timed_count = 1).count(), 2)
+        self.assertEqual(self.visits(), {'Tesco': 1})
+        self.save(self.basket, status = Basket.OPEN)
+        self.assertEqual(set(WeeklyBasketStat.objects.values_list('completed_count', 'timed_count')), {(0, 0)})
+        self.assertEqual(self.visits(), {'Tesco': 0})
+
+    def test_store_change_on_a_completed_basket_moves_the_visit(self):
+        self.save(self.basket, status = Basket.COMPLETED)
+        self.save(self.basket, store = 'Aldi')
+        self.assertEqual(self.visits(), {'Tesco': 0, 'Aldi': 1})
+        self.assertEqual(WeeklyBasketStat.objects.get(user = self.bob).completed_count, 1)
+
+    def test_purchases_follow_status_renames_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute = True):
+            item = Item.objects.create(name = 'Milk', basket = self.basket, creator = self.alice)
+        self.save(item, status = Item.BOUGHT)
+        self.save(item, name = 'Oat milk')
+        counts = dict(ItemPurchaseStat.objects.filter(user = self.alice).values_list('name_key', 'bought_count'))
+        self.assertEqual(counts, {'milk': 0, 'oat milk': 1})
+        with self.captureOnCommitCallbacks(execute = True):
+            item.delete()
+        self.assertEqual(ItemPurchaseStat.objects.get(user = self.bob, name_key = 'oat milk').bought_count, 0)
+
+    def test_opposite_deltas_in_one_batch_cancel_out(self):
+        record_completions(self.basket.pk, [['Tesco', '2026-10-19', 60, 1], ['Tesco', '2026-10-19', 60, -1]])
+        self.assertFalse(WeeklyBasketStat.objects.exists())
+        self.assertFalse(StoreVisitStat.objects.exists())
+
+    def test_incremental_rollups_match_recompute(self):
+        with self.captureOnCommitCallbacks(execute = True):
+            Item.objects.create(name = 'Bread', basket = self.basket, creator = self.alice, status = Item.BOUGHT)
+        self.save(self.basket, status = Basket.COMPLETED)
+        live = snapshot()
+        recompute()
+        self.assertEqual(live, snapshot())
@@ -0,0 +1,56 @@
+from datetime import timedelta
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from .models import ItemPurchaseStat, WeeklyBasketStat, StoreVisitStat
+from .rollups import week_of
+
+
+def positive_int(request, name, default, maximum):
+    try:
+        value = int(request.query_params.get(name, default))
+    except ValueError:
+        raise ValidationError({name: 'Expected a number.'})
+    if value < 1:
+        raise ValidationError({name: 'Expected a positive number.'})
+    return min(value, maximum)
+
+
+# Create your views here.
+class StatsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    #Dashboard numbers across every basket the user owns or shares, read from the precomputed rollups
+    def get (self, request):
+        user = request.user
+        limit = positive_int(request, 'limit', 10, 50)
+        weeks = positive_int(request, 'weeks', 12, 104)
+        first_week = week_of(timezone.now()) - timedelta(weeks = weeks - 1)
+
+        most_bought = (ItemPurchaseStat.objects
+            .filter(user = user, bought_count__gt = 0)
+            .order_by('-bought_count', 'name_key')
+            .values('name', 'bought_count')[:limit])
+        stores = (StoreVisitStat.objects
+            .filter(user = user, visit_count__gt = 0)
+            .order_by('-visit_count', 'store')
+            .values('store', 'visit_count')[:limit])
+        weekly = (WeeklyBasketStat.objects
+            .filter(user = user, week__gte = first_week, completed_count__gt = 0)
+            .order_by('week')
+            .values('week', 'completed_count'))
+        timing = WeeklyBasketStat.objects.filter(user = user).aggregate(
+            seconds = Sum('completion_seconds'),
+            count = Sum('timed_count')
+        )
+        average = timing['seconds'] / timing['count'] if timing['count'] else None
+
+        return Response ({
+            'most_bought': list(most_bought),
+            'busiest_stores': list(stores),
+            'completed_per_week': list(weekly),
+            'average_completion_seconds': average
+        })
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from tasks.queue import run_pending, metrics, queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Run due tasks from the durable task queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type = int, default = 100)
+        parser.add_argument('--loop', action = 'store_true', help = 'Keep polling for new tasks')
+        parser.add_argument('--interval', type = float, default = 1, help = 'Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            ran = run_pending(options['batch_size'])
+            if ran:
+                self.stdout.write(f'Ran {ran} tasks')
+            if not options['loop']:
+                break
+            if not ran:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Queue: {queue_stats()} Metrics: {metrics.snapshot()}'))
@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils import timezone
+
+# Create your models here.
+class QueuedTask(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed' #gave up after TASKS['MAX_ATTEMPTS'], kept for inspection
+
+    STATUS_CHOICES = {
+        PENDING: 'pending',
+        RUNNING: 'running',
+        FAILED: 'failed'
+    }
+
+    name = models.CharField(max_length = 255) #dotted path of the @task function
+    args = models.JSONField(default = list, blank = True)
+    key = models.CharField(max_length = 255, blank = True, null = True) #pending tasks with the same name and key are merged
+
+    status = models.CharField(
+        max_length = 100,
+        choices = STATUS_CHOICES,
+        default = PENDING
+    )
+    attempts = models.PositiveIntegerField(default = 0)
+    run_after = models.DateTimeField(default = timezone.now)
+    started_at = models.DateTimeField(null = True, blank = True)
+    last_error = models.TextField(blank = True)
+    created_at = models.DateTimeField(auto_now_add = True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields = ['name', 'key'],
+                condition = models.Q(status = 'pending'),
+                name = 'unique_pending_task'
+            )
+        ]
+        indexes = [
+            models.Index(fields = ['status', 'run_after'], name = 'queued_task_due')
+        ]
+
+    def __str__(self):
+        return f'{self.name}({self.args}) [{self.status}]'
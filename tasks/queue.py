@@ -0,0 +1,283 @@
+"""
+Small task subsystem for side effects of writes, no broker needed.
+
+    @task
+    def refresh_something(basket_id): ...
+
+    refresh_something.defer(basket.id, key=f'basket:{basket.id}')    # thread pool, after commit
+    refresh_something.enqueue(basket.id, key=f'basket:{basket.id}')  # durable, run by `manage.py run_tasks`
+
+Tasks sharing a key while still waiting are merged into one run, so ten edits
+to a basket cause one refresh. Deferred tasks that keep failing are handed to
+the durable queue, which retries with exponential backoff.
+
+Batch tasks collect a value per call instead, and run once per key with all of them:
+
+    @batch_task
+    def count_items(basket_id, item_ids): ...
+
+    count_items.defer(basket.id, value=item.id, key=f'basket:{basket.id}')
+"""
+
+import logging
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import QueuedTask
+
+logger = logging.getLogger(__name__)
+
+
+def get_setting(name, default):
+    return getattr(settings, 'TASKS', {}).get(name, default)
+
+
+class Metrics:
+    #Per task counters and timings for this process
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(Counter)
+        self.timings = defaultdict(lambda: {'runs': 0, 'total': 0.0, 'max': 0.0})
+
+    def incr(self, name, event):
+        with self.lock:
+            self.counts[name][event] += 1
+
+    def timing(self, name, seconds):
+        with self.lock:
+            timing = self.timings[name]
+            timing['runs'] += 1
+            timing['total'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+
+    def snapshot(self):
+        with self.lock:
+            result = {name: dict(counts) for name, counts in self.counts.items()}
+            for name, timing in self.timings.items():
+                result.setdefault(name, {}).update({
+                    'avg_ms': round(timing['total'] / timing['runs'] * 1000, 2),
+                    'max_ms': round(timing['max'] * 1000, 2),
+                })
+            return result
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+            self.timings.clear()
+
+
+metrics = Metrics()
+
+executor = None
+executor_lock = threading.Lock()
+waiting_keys = set()
+waiting_batches = {} #(task name, key) -> values collected for the next run
+
+
+def get_executor():
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=get_setting('WORKERS', 4), thread_name_prefix='tasks')
+        return executor
+
+
+class Task:
+    def __init__(self, func):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__name__}'
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    def run(self, args):
+        start = time.perf_counter()
+        try:
+            self.func(*args)
+        except Exception:
+            metrics.incr(self.name, 'failed')
+            raise
+        metrics.incr(self.name, 'succeeded')
+        metrics.timing(self.name, time.perf_counter() - start)
+
+    def defer(self, *args, key=None):
+        #Run in the thread pool once the current transaction commits (straight away outside one)
+        transaction.on_commit(lambda: self.submit(args, key))
+
+    def submit(self, args, key):
+        metrics.incr(self.name, 'submitted')
+        if key is not None:
+            with executor_lock:
+                if (self.name, key) in waiting_keys:
+                    metrics.incr(self.name, 'merged')
+                    return
+                waiting_keys.add((self.name, key))
+        if get_setting('EAGER', False):
+            self.run_deferred(args, key)
+        else:
+            get_executor().submit(self.run_deferred, args, key)
+
+    def run_deferred(self, args, key):
+        #Changes made after the task starts need a new run, so the key is released first
+        if key is not None:
+            with executor_lock:
+                waiting_keys.discard((self.name, key))
+        attempts = get_setting('IN_PROCESS_ATTEMPTS', 3)
+        try:
+            for attempt in range(1, attempts + 1):
+                try:
+                    return self.run(args)
+                except Exception:
+                    if attempt == attempts:
+                        logger.exception('Task %s failed %s times, moving it to the durable queue', self.name, attempts)
+                        self.enqueue(*args, key=key)
+                        return
+                    metrics.incr(self.name, 'retried')
+                    time.sleep(get_setting('RETRY_DELAY', 1) * 2 ** (attempt - 1))
+        finally:
+            if not get_setting('EAGER', False):
+                connection.close()
+
+    def enqueue(self, *args, key=None, delay=0):
+        """
+        Save the task to the durable queue as part of the current transaction.
+        Returns None when a pending task with the same key already covers it.
+        """
+        metrics.incr(self.name, 'enqueued')
+        fields = {'name': self.name, 'args': list(args), 'key': key, 'run_after': timezone.now() + timedelta(seconds=delay)}
+        if key is None:
+            return QueuedTask.objects.create(**fields)
+        try:
+            with transaction.atomic():
+                return QueuedTask.objects.create(**fields)
+        except IntegrityError:
+            metrics.incr(self.name, 'merged')
+            return None
+
+    def absorb(self, queued):
+        #A retry found a newer pending task with its key, which does the same work
+        pass
+
+
+class BatchTask(Task):
+    """
+    Task whose last argument is a list of values. Every value deferred under the same
+    key before the run starts goes into that one run, func(*args, values).
+    """
+    def defer(self, *args, value, key):
+        transaction.on_commit(lambda: self.submit_value(args, value, key))
+
+    def submit_value(self, args, value, key):
+        metrics.incr(self.name, 'submitted')
+        with executor_lock:
+            values = waiting_batches.get((self.name, key))
+            if values is not None:
+                values.append(value)
+                metrics.incr(self.name, 'merged')
+                return
+            waiting_batches[(self.name, key)] = [value]
+        if get_setting('EAGER', False):
+            self.run_batch(args, key)
+        else:
+            get_executor().submit(self.run_batch, args, key)
+
+    def run_batch(self, args, key):
+        #Give the rest of a burst (e.g. the other on-commit hooks of the same transaction) time to join
+        if not get_setting('EAGER', False):
+            time.sleep(get_setting('BATCH_DELAY', 0.05))
+        with executor_lock:
+            values = waiting_batches.pop((self.name, key))
+        self.run_deferred((*args, values), key)
+
+    def enqueue(self, *args, key=None, delay=0):
+        #Values for a key that already has a pending row are added to that row
+        if key is None:
+            return super().enqueue(*args, delay=delay)
+        metrics.incr(self.name, 'enqueued')
+        fields = {'name': self.name, 'args': list(args), 'key': key, 'run_after': timezone.now() + timedelta(seconds=delay)}
+        while True:
+            try:
+                with transaction.atomic():
+                    return QueuedTask.objects.create(**fields)
+            except IntegrityError:
+                pass
+            with transaction.atomic():
+                pending = QueuedTask.objects.select_for_update().filter(name=self.name, key=key, status=QueuedTask.PENDING).first()
+                if pending is not None:
+                    pending.args[-1].extend(args[-1])
+                    pending.save(update_fields=['args'])
+                    metrics.incr(self.name, 'merged')
+                    return pending
+            #Claimed by a worker in between, try creating it again
+
+    def absorb(self, queued):
+        self.enqueue(*queued.args, key=queued.key)
+
+
+def task(func):
+    return Task(func)
+
+
+def batch_task(func):
+    return BatchTask(func)
+
+
+def claim(batch_size):
+    #Lock a batch of due tasks (and any left running by a dead worker) so parallel workers never share one
+    now = timezone.now()
+    stale = now - timedelta(seconds=get_setting('RUNNING_TIMEOUT', 600))
+    with transaction.atomic():
+        tasks = list(QueuedTask.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status=QueuedTask.PENDING, run_after__lte=now) | Q(status=QueuedTask.RUNNING, started_at__lt=stale))
+            .order_by('run_after', 'pk')[:batch_size])
+        QueuedTask.objects.filter(pk__in=[queued.pk for queued in tasks]).update(
+            status=QueuedTask.RUNNING, started_at=now, attempts=F('attempts') + 1
+        )
+    for queued in tasks:
+        queued.attempts += 1
+    return tasks
+
+
+def retry_later(queued, error):
+    queued.last_error = error
+    if queued.attempts >= get_setting('MAX_ATTEMPTS', 5):
+        queued.status = QueuedTask.FAILED
+        queued.save(update_fields=['status', 'last_error'])
+        return
+    queued.status = QueuedTask.PENDING
+    queued.run_after = timezone.now() + timedelta(seconds=get_setting('RETRY_DELAY', 1) * 2 ** queued.attempts)
+    try:
+        with transaction.atomic():
+            queued.save(update_fields=['status', 'run_after', 'last_error'])
+    except IntegrityError:
+        #A newer task with the same key is already waiting, batch tasks hand their values over to it
+        import_string(queued.name).absorb(queued)
+        queued.delete()
+
+
+def run_pending(batch_size=100):
+    #Run one batch of due durable tasks, returns how many ran
+    tasks = claim(batch_size)
+    for queued in tasks:
+        try:
+            import_string(queued.name).run(queued.args)
+        except Exception:
+            logger.exception('Queued task %s failed (attempt %s)', queued.pk, queued.attempts)
+            retry_later(queued, traceback.format_exc())
+        else:
+            queued.delete()
+    return len(tasks)
+
+
+def queue_stats():
+    return dict(QueuedTask.objects.values_list('status').annotate(total=Count('pk')).order_by())
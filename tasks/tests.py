@@ -0,0 +1,133 @@
+import threading
+from datetime import timedelta
+from unittest import skipUnless
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from .models import QueuedTask
+from .queue import batch_task, claim, retry_later, run_pending, task
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task
+def explode(value):
+    calls.append(value)
+    raise RuntimeError('boom')
+
+
+@batch_task
+def remember_batch(basket_id, values):
+    calls.append((basket_id, values))
+
+
+TASKS = {**settings.TASKS, 'EAGER': True, 'RETRY_DELAY': 10, 'IN_PROCESS_ATTEMPTS': 2, 'MAX_ATTEMPTS': 3}
+
+
+@override_settings(TASKS = TASKS)
+class DurableQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_takes_due_tasks_once(self):
+        due = remember.enqueue(1)
+        remember.enqueue(2, delay = 60)
+        claimed = claim(10)
+        self.assertEqual([queued.pk for queued in claimed], [due.pk])
+        due.refresh_from_db()
+        self.assertEqual((due.status, due.attempts), (QueuedTask.RUNNING, 1))
+        self.assertEqual(claim(10), [])
+
+    def test_claim_takes_back_tasks_of_a_dead_worker(self):
+        queued = remember.enqueue(1)
+        claim(10)
+        QueuedTask.objects.filter(pk = queued.pk).update(started_at = timezone.now() - timedelta(hours = 1))
+        self.assertEqual([(queued.pk, queued.attempts) for queued in claim(10)], [(queued.pk, 2)])
+
+    def test_run_pending_deletes_done_tasks_and_backs_off_failures(self):
+        remember.enqueue(1)
+        failing = explode.enqueue(2)
+        before = timezone.now()
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, [1, 2])
+        failing.refresh_from_db()
+        self.assertEqual(QueuedTask.objects.get(), failing)
+        self.assertEqual(failing.status, QueuedTask.PENDING)
+        self.assertIn('boom', failing.last_error)
+        #RETRY_DELAY * 2 ** attempts
+        self.assertGreaterEqual(failing.run_after, before + timedelta(seconds = 20))
+
+    def test_retry_gives_up_after_max_attempts(self):
+        queued = explode.enqueue(1)
+        QueuedTask.objects.filter(pk = queued.pk).update(attempts = 2)
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            run_pending()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (QueuedTask.FAILED, 3))
+        self.assertEqual(claim(10), [])
+
+    def test_enqueue_merges_tasks_with_a_pending_key(self):
+        self.assertIsNotNone(remember.enqueue(1, key = 'basket:1'))
+        self.assertIsNone(remember.enqueue(1, key = 'basket:1'))
+        self.assertIsNotNone(remember.enqueue(2, key = 'basket:2'))
+        self.assertEqual(QueuedTask.objects.count(), 2)
+
+    def test_batch_enqueue_adds_values_to_the_pending_row(self):
+        remember_batch.enqueue(1, [10], key = 'basket:1')
+        remember_batch.enqueue(1, [11, 12], key = 'basket:1')
+        self.assertEqual(QueuedTask.objects.get().args, [1, [10, 11, 12]])
+        run_pending()
+        self.assertEqual(calls, [(1, [10, 11, 12])])
+
+    def test_batch_retry_hands_values_to_a_newer_pending_row(self):
+        remember_batch.enqueue(1, [10], key = 'basket:1')
+        running = claim(10)[0]
+        remember_batch.enqueue(1, [11], key = 'basket:1') #a new write while the first run failed
+        retry_later(running, 'boom')
+        self.assertEqual(QueuedTask.objects.get().args, [1, [11, 10]])
+
+    def test_deferred_task_moves_to_the_queue_after_in_process_attempts(self):
+        with override_settings(TASKS = {**TASKS, 'RETRY_DELAY': 0}):
+            with self.assertLogs('tasks.queue', 'ERROR'), self.captureOnCommitCallbacks(execute = True):
+                explode.defer(1, key = 'item:1')
+        self.assertEqual(calls, [1, 1])
+        queued = QueuedTask.objects.get()
+        self.assertEqual((queued.name, queued.args, queued.key), ('tasks.tests.explode', [1], 'item:1'))
+
+    def test_batch_defer_runs_once_per_key_after_commit(self):
+        with self.captureOnCommitCallbacks(execute = True):
+            remember_batch.defer(1, value = 10, key = 'basket:1')
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [(1, [10])])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'SKIP LOCKED needs Postgres')
+@override_settings(TASKS = TASKS)
+class ClaimSkipLockedTests(TransactionTestCase):
+    def test_parallel_workers_skip_locked_tasks(self):
+        first, second = remember.enqueue(1), remember.enqueue(2)
+        locked, release = threading.Event(), threading.Event()
+
+        def other_worker():
+            #Holds the first task's row lock, as a worker in the middle of claiming it would
+            with transaction.atomic():
+                list(QueuedTask.objects.select_for_update().filter(pk = first.pk))
+                locked.set()
+                release.wait(10)
+            connection.close()
+
+        thread = threading.Thread(target = other_worker)
+        thread.start()
+        locked.wait(10)
+        try:
+            self.assertEqual([queued.pk for queued in claim(10)], [second.pk])
+        finally:
+            release.set()
+            thread.join()
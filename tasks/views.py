@@ -0,0 +1,12 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from .queue import metrics, queue_stats
+
+# Create your views here.
+class TaskMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    #Task counters of this worker process and the size of the durable queue
+    def get (self, request):
+        return Response ({'process': metrics.snapshot(), 'queue': queue_stats()})
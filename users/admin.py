@@ -1,5 +1,26 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import User
+from utils.admin import EstimatedCountPaginator
 
 # Register your models here.
-admin.site.register(User)
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    list_display = ['id', 'username', 'email', 'is_staff', 'is_active', 'deleted_at']
+    # Prefix searches, served by the UPPER(...) text_pattern_ops indexes from migration 0006
+    search_fields = ['^username', '^email']
+    raw_id_fields = ['connections']
+    ordering = ['-id']
+    fieldsets = BaseUserAdmin.fieldsets + (
+        ('Family basket', {'fields': ['profile_image', 'connections']}),
+    )
+    # Email is unique and required, the default add form would save it blank
+    add_fieldsets = (
+        (None, {
+            'classes': ['wide'],
+            'fields': ['username', 'email', 'usable_password', 'password1', 'password2'],
+        }),
+    )
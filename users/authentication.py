@@ -0,0 +1,22 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from .revocation import denylist, is_current
+
+
+def revoked():
+    return InvalidToken({'detail': 'Token has been revoked', 'code': 'token_revoked'})
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    #simplejwt authentication plus the in-memory session check and the user's token version
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if denylist.is_revoked(token):
+            raise revoked()
+        return token
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if not is_current(validated_token, user):
+            raise revoked()
+        return user
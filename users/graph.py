@@ -0,0 +1,85 @@
+from collections import Counter
+from django.db import transaction
+from baskets.models import Basket
+from tasks.queue import task
+from .models import User, ConnectionSuggestion
+
+Connection = User.connections.through
+SharedWith = Basket.shared_with.through
+
+
+def neighbours(user_ids):
+    #Direct connections of each user, read straight from the M2M table (it stores both directions)
+    adjacency = {user_id: set() for user_id in user_ids}
+    rows = Connection.objects.filter(from_user_id__in = user_ids).values_list('from_user_id', 'to_user_id')
+    for from_id, to_id in rows:
+        adjacency[from_id].add(to_id)
+    return adjacency
+
+
+def basket_members(user_id):
+    #How many baskets the user has in common with everyone else (as owner or shared member)
+    basket_ids = set(Basket.objects.filter(owner_id = user_id).values_list('id', flat = True))
+    basket_ids.update(SharedWith.objects.filter(user_id = user_id).values_list('basket_id', flat = True))
+
+    members = {basket_id: set() for basket_id in basket_ids}
+    for basket_id, owner_id in Basket.objects.filter(id__in = basket_ids).values_list('id', 'owner_id'):
+        members[basket_id].add(owner_id)
+    for basket_id, member_id in SharedWith.objects.filter(basket_id__in = basket_ids).values_list('basket_id', 'user_id'):
+        members[basket_id].add(member_id)
+
+    shared = Counter()
+    for people in members.values():
+        shared.update(people - {user_id})
+    return shared
+
+
+def suggestions_for(user_id):
+    friends = neighbours([user_id])[user_id]
+    mutual = Counter()
+    for friends_of_friend in neighbours(friends).values():
+        mutual.update(friends_of_friend - friends - {user_id})
+    shared = basket_members(user_id)
+    return [
+        ConnectionSuggestion(user_id = user_id, candidate_id = candidate_id, mutual_connections = count, shared_baskets = shared[candidate_id])
+        for candidate_id, count in mutual.items()
+    ]
+
+
+def refresh(user_ids):
+    #Recompute the suggestion rows of the given users
+    for user_id in user_ids:
+        rows = suggestions_for(user_id)
+        with transaction.atomic():
+            ConnectionSuggestion.objects.filter(user_id = user_id).delete()
+            ConnectionSuggestion.objects.bulk_create(rows)
+
+
+@task
+def refresh_user(user_id):
+    refresh([user_id])
+
+
+def affected_by_connection(user_ids):
+    #A new or removed edge changes the suggestions of both ends and of everyone connected to them
+    affected = set(user_ids)
+    for friends in neighbours(user_ids).values():
+        affected.update(friends)
+    return affected
+
+
+def affected_by_baskets(basket_ids):
+    #Sharing changes the shared basket counts of every member of the basket
+    affected = set(Basket.objects.filter(id__in = basket_ids).values_list('owner_id', flat = True))
+    affected.update(SharedWith.objects.filter(basket_id__in = basket_ids).values_list('user_id', flat = True))
+    return affected
+
+
+def rebuild(batch_size = 500):
+    user_ids = User.objects.order_by('pk').values_list('pk', flat = True)
+    total = 0
+    for start in range(0, user_ids.count(), batch_size):
+        batch = list(user_ids[start:start + batch_size])
+        refresh(batch)
+        total += len(batch)
+        yield total
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from users.revocation import prune
+
+
+class Command(BaseCommand):
+    help = 'Delete token revocations whose tokens have expired anyway'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f'Deleted {prune()} expired revocations'))
@@ -0,0 +1,21 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from utils.purge import purge_deleted
+
+
+class Command(BaseCommand):
+    help = 'Permanently delete soft-deleted users and baskets, with their dependents, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type = int, default = getattr(settings, 'PURGE_BATCH_SIZE', 1000))
+        parser.add_argument('--loop', action = 'store_true', help = 'Keep running, checking for new deletions every --interval seconds')
+        parser.add_argument('--interval', type = int, default = 60)
+
+    def handle(self, *args, **options):
+        while True:
+            users, baskets = purge_deleted(options['batch_size'], self.stdout.write)
+            self.stdout.write(self.style.SUCCESS(f'Purged {users} users and {baskets} baskets'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from users.graph import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the friends-of-friends connection suggestions of every user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type = int, default = 500)
+
+    def handle(self, *args, **options):
+        total = 0
+        for total in rebuild(options['batch_size']):
+            self.stdout.write(f'Refreshed {total} users')
+        self.stdout.write(self.style.SUCCESS(f'Refreshed suggestions for {total} users'))
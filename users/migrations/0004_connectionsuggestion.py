@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-19 17:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_user_email_alter_user_username'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConnectionSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mutual_connections', models.PositiveIntegerField(default=0)),
+                ('shared_baskets', models.PositiveIntegerField(default=0)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='connection_suggestions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-shared_baskets', '-mutual_connections'], name='connection_suggestion_rank')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'candidate'), name='unique_connection_suggestion')],
+            },
+        ),
+    ]
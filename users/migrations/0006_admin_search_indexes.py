@@ -0,0 +1,16 @@
+# Generated by Django 6.0 on 2026-10-19 17:12
+
+from django.db import migrations
+from utils.operations import upper_pattern_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_deleted_at'),
+    ]
+
+    operations = [
+        upper_pattern_index('user_username_upper_idx', 'users_user', 'username'),
+        upper_pattern_index('user_email_upper_idx', 'users_user', 'email'),
+    ]
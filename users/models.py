@@ -17,4 +17,37 @@ class User(AbstractUser):
         })
     profile_image = models.URLField (blank = True, null = True) 
     connections = models.ManyToManyField('self', symmetrical = True, blank = True)
-    
\ No newline at end of file
+    deleted_at = models.DateTimeField(null = True, blank = True, editable = False, db_index = True) #set on soft delete, purged later
+    token_version = models.PositiveIntegerField(default = 0, editable = False) #bumped on password change, tokens carry it as `ver`
+    
+
+#Friends-of-friends a user may want to share baskets with, kept up to date by users/graph.py
+class ConnectionSuggestion(models.Model):
+    user = models.ForeignKey(
+        to = User,
+        on_delete = models.CASCADE,
+        related_name = 'connection_suggestions'
+    )
+    candidate = models.ForeignKey(
+        to = User,
+        on_delete = models.CASCADE,
+        related_name = '+'
+    )
+    mutual_connections = models.PositiveIntegerField(default = 0)
+    shared_baskets = models.PositiveIntegerField(default = 0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields = ['user', 'candidate'], name = 'unique_connection_suggestion')
+        ]
+        indexes = [
+            models.Index(fields = ['user', '-shared_baskets', '-mutual_connections'], name = 'connection_suggestion_rank')
+        ]
+
+
+#Revoked sign-in sessions (see users/revocation.py): refresh tokens below `generation`, or every token when it is null
+class TokenRevocation(models.Model):
+    family = models.CharField(max_length = 255, unique = True)
+    generation = models.PositiveIntegerField(null = True, blank = True)
+    expires_at = models.DateTimeField(db_index = True) #after this the revoked tokens are expired anyway
+    updated_at = models.DateTimeField(auto_now = True, db_index = True)
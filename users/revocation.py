@@ -0,0 +1,172 @@
+"""
+JWT revocation without a DB query per request.
+
+Tokens carry two extra claims:
+- `ver`, the user's token_version when they signed in. A password change bumps
+  the version, and the user row (which authentication loads anyway) rejects
+  older tokens. There is no timestamp race with tokens issued in the same second.
+- `fam`, the id of the sign-in session, shared by every refresh token rotated
+  from it and every access token they issue, and `gen`, how many times its
+  refresh token has been rotated.
+
+Every process keeps one entry per revoked session in memory: refresh tokens
+of the session below a generation are revoked (rotation), or the whole session
+is (sign out). Rotation compares and increments the generation in the row, so
+a refresh token is used once even by concurrent requests. Each sync re-reads
+the rows updated in the last few seconds, so a row whose transaction commits
+late is still picked up. Entries are dropped once
+the tokens they revoke would have expired anyway.
+"""
+
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from .models import TokenRevocation, User
+
+SIGNED_OUT = None #generation of a session whose tokens are all revoked
+
+
+def family_of(token):
+    #Tokens issued before sessions existed act as their own session
+    return token.get('fam') or token['jti']
+
+
+def is_newer(generation, current):
+    #Whether `generation` revokes more than `current`, where SIGNED_OUT revokes everything
+    if current is SIGNED_OUT:
+        return False
+    return generation is SIGNED_OUT or generation > current
+
+
+class Denylist:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.families = {} #session id -> (generation, expiry timestamp)
+        self.synced_at = None
+
+    def add(self, family, generation, expires_at):
+        expires = expires_at.timestamp()
+        current = self.families.get(family)
+        if current is None:
+            self.families[family] = (generation, expires)
+        else:
+            kept = generation if is_newer(generation, current[0]) else current[0]
+            self.families[family] = (kept, max(expires, current[1]))
+
+    def evict(self, now):
+        self.families = {family: entry for family, entry in self.families.items() if entry[1] > now}
+
+    def sync(self, force=False):
+        interval = getattr(settings, 'TOKEN_REVOCATION_SYNC', 5)
+        if not force and self.synced_at and time.time() - self.synced_at.timestamp() < interval:
+            return
+        with self.lock:
+            now = timezone.now()
+            rows = TokenRevocation.objects.filter(expires_at__gt=now)
+            if self.synced_at:
+                #Overlap the previous sync, rows can commit a while after their updated_at
+                rows = rows.filter(updated_at__gte=self.synced_at - timedelta(seconds=getattr(settings, 'TOKEN_REVOCATION_WINDOW', 60)))
+            for family, generation, expires_at in rows.values_list('family', 'generation', 'expires_at'):
+                self.add(family, generation, expires_at)
+            self.evict(now.timestamp())
+            self.synced_at = now
+
+    def is_revoked(self, token):
+        self.sync()
+        entry = self.families.get(family_of(token))
+        if entry is None:
+            return False
+        generation = entry[0]
+        if generation is SIGNED_OUT:
+            return True
+        return token.get('token_type') == 'refresh' and token.get('gen', 0) < generation
+
+    def clear(self):
+        with self.lock:
+            self.families.clear()
+            self.synced_at = None
+
+
+denylist = Denylist()
+
+
+def max_token_lifetime():
+    return max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+
+
+def start_session(token, user):
+    #Claims for a fresh sign-in, copied into the access tokens it issues
+    token['fam'] = uuid.uuid4().hex
+    token['gen'] = 0
+    token['ver'] = user.token_version
+
+
+def remember(family, generation, expires_at):
+    with denylist.lock:
+        denylist.add(family, generation, expires_at)
+
+
+def advance(family, generation, expires_at):
+    #Compare-and-increment the session's generation, True if this call moved it on from `generation`.
+    #Two refreshes with the same token both pass the denylist, only one of them can win here
+    if generation == 0:
+        #A session's first rotation creates its row, a second one hits the unique family
+        try:
+            with transaction.atomic():
+                TokenRevocation.objects.create(family=family, generation=1, expires_at=expires_at)
+        except IntegrityError:
+            return False
+    else:
+        rows = TokenRevocation.objects.filter(family=family, generation=generation)
+        if not rows.update(generation=generation + 1, expires_at=expires_at, updated_at=timezone.now()):
+            return False
+    remember(family, generation + 1, expires_at)
+    return True
+
+
+def rotate(refresh):
+    #Move the session to its next refresh token, the earlier ones stop working.
+    #None when the token was already used, by a concurrent refresh or after sign out
+    generation = refresh.get('gen', 0)
+    refresh['fam'] = family_of(refresh)
+    refresh['gen'] = generation + 1
+    refresh.set_jti()
+    refresh.set_exp()
+    refresh.set_iat()
+    expires_at = datetime.fromtimestamp(refresh['exp'], tz=dt_timezone.utc)
+    if not advance(refresh['fam'], generation, expires_at):
+        return None
+    return refresh
+
+
+def revoke_session(token):
+    #Sign out: every access and refresh token of the token's session
+    family, expires_at = family_of(token), timezone.now() + max_token_lifetime()
+    rows = TokenRevocation.objects.filter(family=family, generation__isnull=False)
+    if not rows.update(generation=SIGNED_OUT, expires_at=expires_at, updated_at=timezone.now()):
+        try:
+            with transaction.atomic():
+                TokenRevocation.objects.create(family=family, generation=SIGNED_OUT, expires_at=expires_at)
+        except IntegrityError:
+            rows.update(generation=SIGNED_OUT, expires_at=expires_at, updated_at=timezone.now()) #a rotation created the row meanwhile
+    remember(family, SIGNED_OUT, expires_at)
+
+
+def revoke_user_tokens(user):
+    #Revoke every token issued to the user so far, e.g. after a password change
+    User.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+    user.refresh_from_db(fields=['token_version'])
+
+
+def is_current(token, user):
+    return token.get('ver', 0) == user.token_version
+
+
+def prune():
+    return TokenRevocation.objects.filter(expires_at__lte=timezone.now()).delete()[0]
@@ -2,9 +2,18 @@ from rest_framework import serializers
 from ..models import User
 from django.contrib.auth import password_validation, hashers
 
+#Soft-deleted users drop out of everyone's connections straight away, the purge removes them later.
+#Filtered in Python so prefetched connections are used as they are
+class ConnectionsField (serializers.ManyRelatedField):
+    def get_attribute (self, instance):
+        return [user for user in super().get_attribute(instance) if user.deleted_at is None]
+
 class UserSerializer (serializers.ModelSerializer): 
     password = serializers.CharField (write_only= True)
     confirm_password = serializers.CharField(write_only = True)
+    connections = ConnectionsField(
+        child_relation = serializers.PrimaryKeyRelatedField(queryset = User.objects.filter(deleted_at__isnull = True)),
+        required = False)
     
     class Meta: 
         model = User
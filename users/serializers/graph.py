@@ -0,0 +1,10 @@
+from rest_framework import serializers
+from ..models import ConnectionSuggestion
+from .common import UserSerializer
+
+class ConnectionSuggestionSerializer (serializers.ModelSerializer):
+    candidate = UserSerializer()
+
+    class Meta:
+        model = ConnectionSuggestion
+        fields = ['candidate', 'mutual_connections', 'shared_baskets']
@@ -1,4 +1,18 @@
+from rest_framework import serializers
 from .common import UserSerializer
 
 class PopulatedUserSerializer (UserSerializer):
-    connections = UserSerializer(many=True)
\ No newline at end of file
+    #The first connections only, the full list is paginated at auth/connections/
+    connections = serializers.SerializerMethodField()
+    connection_count = serializers.SerializerMethodField()
+    connections_preview = 20
+
+    class Meta (UserSerializer.Meta):
+        fields = [*UserSerializer.Meta.fields, 'connection_count']
+
+    def get_connections (self, user):
+        connections = user.connections.filter(deleted_at__isnull=True).order_by('username').prefetch_related('connections')[:self.connections_preview]
+        return UserSerializer(connections, many=True).data
+
+    def get_connection_count (self, user):
+        return user.connections.filter(deleted_at__isnull=True).count()
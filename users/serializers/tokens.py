@@ -1,4 +1,9 @@
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from ..authentication import revoked
+from ..models import User
+from ..revocation import denylist, is_current, rotate, start_session
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
@@ -11,4 +16,27 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
             'username': user.username,
             'profile_image': user.profile_image
         }
-        return token
\ No newline at end of file
+        start_session(token, user)
+        return token
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    #Refuse revoked refresh tokens, and rotate the session so the old one stops working
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if denylist.is_revoked(refresh):
+            raise revoked()
+        try:
+            user = User.objects.get(**{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)})
+        except User.DoesNotExist:
+            user = None
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        if not is_current(refresh, user):
+            raise revoked()
+
+        if not api_settings.ROTATE_REFRESH_TOKENS:
+            return {'access': str(refresh.access_token)}
+        refresh = rotate(refresh)
+        if refresh is None:
+            raise revoked()
+        return {'access': str(refresh.access_token), 'refresh': str(refresh)}
@@ -0,0 +1,41 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+from baskets.models import Basket
+from .models import User
+from . import graph
+
+
+def refresh_on_commit(user_ids):
+    #One task per user, so several changes around the same person before it runs are merged
+    for user_id in user_ids:
+        graph.refresh_user.defer(user_id, key = f'user:{user_id}')
+
+
+@receiver(m2m_changed, sender = User.connections.through)
+def connections_changed(sender, instance, action, pk_set, **kwargs):
+    if action == 'pre_clear':
+        #The cleared ids are gone by post_clear, remember them now
+        instance._cleared_connections = set(instance.connections.values_list('pk', flat = True))
+    elif action == 'post_clear':
+        ids = {instance.pk, *getattr(instance, '_cleared_connections', set())}
+        refresh_on_commit(graph.affected_by_connection(ids))
+    elif action in ('post_add', 'post_remove'):
+        refresh_on_commit(graph.affected_by_connection({instance.pk, *pk_set}))
+
+
+@receiver(m2m_changed, sender = Basket.shared_with.through)
+def shared_with_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    #reverse means the change was made from the user side (user.baskets_shared.add(basket))
+    if action == 'pre_clear':
+        instance._cleared_shares = set(
+            instance.baskets_shared.values_list('pk', flat = True) if reverse
+            else instance.shared_with.values_list('pk', flat = True)
+        )
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    changed = pk_set if pk_set is not None else getattr(instance, '_cleared_shares', set())
+    if reverse:
+        affected = {instance.pk} | graph.affected_by_baskets(changed)
+    else:
+        affected = {instance.owner_id, *changed} | graph.affected_by_baskets([instance.pk])
+    refresh_on_commit(affected)
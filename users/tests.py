@@ -1,3 +1,240 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from utils.purge import soft_delete
+from utils.throttling import LocalCounter, SlidingWindowThrottle, SignInUserThrottle, local_counter
+from baskets.models import Basket
+from .models import ConnectionSuggestion, TokenRevocation, User
+from . import graph
+from .revocation import denylist, revoke_user_tokens, rotate
 
-# Create your tests here.
+
+class FixedThrottle(SlidingWindowThrottle):
+    #10 requests a minute for everyone, on a clock the test controls
+    rate = '10/min'
+    clock = 0.0
+
+    def get_ident_value(self, request, view):
+        return 'client'
+
+    def timer(self):
+        return FixedThrottle.clock
+
+
+@override_settings(THROTTLE_COUNTER = 'local')
+class SlidingWindowThrottleTests(SimpleTestCase):
+    def setUp(self):
+        local_counter.clear()
+        self.request = APIRequestFactory().get('/')
+
+    def hit(self, at):
+        FixedThrottle.clock = at
+        throttle = FixedThrottle()
+        return throttle.allow_request(self.request, None), throttle
+
+    def fill(self, at, count):
+        for _ in range(count):
+            self.assertTrue(self.hit(at)[0])
+
+    def test_limit_within_one_window(self):
+        self.fill(0, 10)
+        allowed, throttle = self.hit(30)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 30)
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        self.fill(59, 10)
+        #15s into the next window, 75% of the previous one still overlaps: 7.5 estimated, so 3 more fit
+        self.fill(75, 3)
+        allowed, throttle = self.hit(75)
+        self.assertFalse(allowed)
+        #With 3 in this window the previous 10 must weigh under 7, which takes 30% overlap: 18s into the window
+        self.assertAlmostEqual(throttle.wait(), 18 - 15)
+        self.assertTrue(self.hit(60 + 18.5)[0])
+
+    def test_wait_is_never_negative(self):
+        self.fill(0, 10)
+        allowed, throttle = self.hit(119.9)
+        self.assertTrue(allowed or throttle.wait() >= 0)
+
+    def test_old_windows_are_forgotten(self):
+        self.fill(0, 10)
+        self.assertTrue(self.hit(120)[0])
+
+    def test_cache_counter_matches_local_counter(self):
+        with override_settings(THROTTLE_COUNTER = 'cache', CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.fill(59, 10)
+            self.fill(75, 3)
+            self.assertFalse(self.hit(75)[0])
+
+
+class LocalCounterTests(SimpleTestCase):
+    def test_eviction_keeps_live_windows(self):
+        counter = LocalCounter()
+        counter.max_keys = 2
+        estimate = lambda current, previous: current
+        counter.hit('old', 1, 10, estimate)
+        counter.hit('live', 5, 10, estimate)
+        counter.hit('new', 5, 10, estimate)
+        self.assertEqual(set(counter.windows), {'live', 'new'})
+
+    def test_spraying_keys_keeps_the_count_of_a_hammered_key(self):
+        counter = LocalCounter()
+        counter.max_keys = 20
+        estimate = lambda current, previous: current
+        for _ in range(3):
+            counter.hit('victim', 5, 3, estimate)
+        for n in range(100):
+            self.assertFalse(counter.hit('victim', 5, 3, estimate)[0])
+            counter.hit(f'spray{n}', 5, 3, estimate)
+        self.assertLessEqual(len(counter.windows), 20)
+
+
+class UsernameThrottleTests(SimpleTestCase):
+    def test_non_object_body_has_no_username(self):
+        request = Request(APIRequestFactory().post('/auth/sign-in/', ['x'], format = 'json'), parsers = [JSONParser()])
+        view = type('View', (), {'kwargs': {}})()
+        self.assertIsNone(SignInUserThrottle().get_ident_value(request, view))
+
+
+class DeletedConnectionTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = [User.objects.create_user(username = name, email = f'{name}@x.com', password = 'pw') for name in ('alice', 'bob', 'carol')]
+        self.alice.connections.add(self.bob, self.carol)
+        self.bob.connections.add(self.carol)
+        ConnectionSuggestion.objects.create(user = self.alice, candidate = self.bob)
+        soft_delete(self.carol)
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def test_deleted_users_drop_out_of_connection_lists(self):
+        connections = self.client.get('/auth/connections/').data['results']
+        self.assertEqual([user['username'] for user in connections], ['bob'])
+        self.assertEqual(connections[0]['connections'], [self.alice.pk])
+        self.assertEqual(self.client.get(f'/auth/{self.bob.pk}/mutual/').data['results'], [])
+        detail = self.client.get(f'/auth/{self.alice.pk}/').data
+        self.assertEqual(([user['id'] for user in detail['connections']], detail['connection_count']), ([self.bob.pk], 1))
+
+    def test_deleted_candidates_drop_out_of_suggestions(self):
+        soft_delete(self.bob)
+        self.assertEqual(self.client.get('/auth/connections/suggestions/').data['results'], [])
+
+
+class UserAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username = 'admin', email = 'admin@x.com', password = 'pw')
+        self.client.force_login(self.admin)
+
+    def add(self, username, email):
+        return self.client.post('/admin/users/user/add/', {
+            'username': username, 'email': email, 'usable_password': 'true', 'password1': 'a-long-pass-phrase', 'password2': 'a-long-pass-phrase',
+        })
+
+    def test_add_form_requires_email(self):
+        self.assertEqual(self.add('bob', '').status_code, 200) #form shown again with the error
+        self.assertFalse(User.objects.filter(username = 'bob').exists())
+        self.assertEqual(self.add('bob', 'bob@x.com').status_code, 302)
+        self.assertEqual(self.add('carol', 'carol@x.com').status_code, 302)
+        self.assertEqual(User.objects.get(username = 'carol').email, 'carol@x.com')
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear() #sign-in throttle counters
+        denylist.clear()
+        self.user = User.objects.create_user(username = 'alice', email = 'alice@x.com', password = 'pw')
+
+    def sign_in(self):
+        return self.client.post('/auth/sign-in/', {'username': 'alice', 'password': 'pw'}).json()
+
+    def refresh(self, token):
+        return self.client.post('/auth/token/refresh/', {'refresh': token})
+
+    def get_user(self, access):
+        return self.client.get(f'/auth/{self.user.pk}/', HTTP_AUTHORIZATION = f'Bearer {access}')
+
+    def test_rotation_revokes_the_previous_refresh_token(self):
+        tokens = self.sign_in()
+        rotated = self.refresh(tokens['refresh'])
+        self.assertEqual(rotated.status_code, 200)
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+        self.assertEqual(self.refresh(rotated.json()['refresh']).status_code, 200)
+        self.assertEqual(TokenRevocation.objects.count(), 1) #one row per session, not per rotation
+
+    def test_concurrent_refreshes_with_one_token_rotate_once(self):
+        token = self.sign_in()['refresh']
+        #Both requests passed the denylist before either rotated
+        rotated = str(rotate(RefreshToken(token)))
+        self.assertIsNone(rotate(RefreshToken(token)))
+        #Same again for a session that already has its row
+        self.assertIsNotNone(rotate(RefreshToken(rotated)))
+        self.assertIsNone(rotate(RefreshToken(rotated)))
+
+    def test_sign_out_revokes_the_session(self):
+        tokens = self.sign_in()
+        response = self.client.post('/auth/sign-out/', {'refresh': tokens['refresh']}, HTTP_AUTHORIZATION = f'Bearer {tokens["access"]}')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_user(tokens['access']).status_code, 401)
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+
+    def test_other_processes_pick_up_revocations_on_sync(self):
+        tokens = self.sign_in()
+        self.client.post('/auth/sign-out/', {'refresh': tokens['refresh']}, HTTP_AUTHORIZATION = f'Bearer {tokens["access"]}')
+        denylist.clear() #a process that hasn't seen the sign-out yet
+        self.assertTrue(denylist.is_revoked(RefreshToken(tokens['refresh'])))
+
+    def test_password_change_revokes_earlier_tokens(self):
+        tokens = self.sign_in()
+        self.assertEqual(self.get_user(tokens['access']).status_code, 200)
+        revoke_user_tokens(self.user)
+        self.assertEqual(self.get_user(tokens['access']).status_code, 401)
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+        self.assertEqual(self.get_user(self.sign_in()['access']).status_code, 200)
+
+
+@override_settings(TASKS = {**settings.TASKS, 'EAGER': True})
+class ConnectionSuggestionTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol, self.dan, self.erin = [
+            User.objects.create_user(username = name, email = f'{name}@x.com', password = 'pw')
+            for name in ('alice', 'bob', 'carol', 'dan', 'erin')]
+        #alice - bob - carol, alice - dan - carol, dan - erin
+        with self.captureOnCommitCallbacks(execute = True):
+            self.alice.connections.add(self.bob, self.dan)
+            self.carol.connections.add(self.bob, self.dan)
+            self.erin.connections.add(self.dan)
+
+    def suggested(self, user):
+        rows = ConnectionSuggestion.objects.filter(user = user).values_list('candidate__username', 'mutual_connections', 'shared_baskets')
+        return set(rows)
+
+    def test_friends_of_friends_with_their_mutual_count(self):
+        self.assertEqual(self.suggested(self.alice), {('carol', 2, 0), ('erin', 1, 0)})
+        self.assertEqual(self.suggested(self.erin), {('alice', 1, 0), ('carol', 1, 0)})
+
+    def test_new_connections_and_shares_refresh_everyone_affected(self):
+        with self.captureOnCommitCallbacks(execute = True):
+            self.alice.connections.add(self.erin)
+            basket = Basket.objects.create(name = 'party', owner = self.alice)
+            basket.shared_with.add(self.carol)
+        self.assertEqual(self.suggested(self.alice), {('carol', 2, 1)})
+        self.assertEqual(self.suggested(self.carol), {('alice', 2, 1), ('erin', 1, 0)})
+
+    def test_rebuild_matches_incremental_rows(self):
+        rows = set(ConnectionSuggestion.objects.values_list('user', 'candidate', 'mutual_connections', 'shared_baskets'))
+        ConnectionSuggestion.objects.all().delete()
+        list(graph.rebuild(batch_size = 2))
+        self.assertEqual(set(ConnectionSuggestion.objects.values_list('user', 'candidate', 'mutual_connections', 'shared_baskets')), rows)
+
+    def test_view_ranks_by_shared_baskets_then_mutual_connections(self):
+        with self.captureOnCommitCallbacks(execute = True):
+            basket = Basket.objects.create(name = 'party', owner = self.alice)
+            basket.shared_with.add(self.erin)
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        results = client.get('/auth/connections/suggestions/').data['results']
+        self.assertEqual([(hit['candidate']['username'], hit['shared_baskets']) for hit in results], [('erin', 1), ('carol', 0)])
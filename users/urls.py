@@ -1,13 +1,17 @@
 from django.urls import path
-from .views import SignUpView, UserView, UserDetailView, UpdatePasswordView
+from .views import SignUpView, SignInView, RefreshView, SignOutView, UserView, UserDetailView, UpdatePasswordView, ConnectionsView, MutualConnectionsView, ConnectionSuggestionsView
 from baskets.views import BasketUserView
-from rest_framework_simplejwt.views import TokenObtainPairView
 
 urlpatterns = [
     path ('', UserView.as_view()),
     path ('sign-up/', SignUpView.as_view()),
-    path ('sign-in/', TokenObtainPairView.as_view()),
+    path ('sign-in/', SignInView.as_view()),
+    path ('token/refresh/', RefreshView.as_view()),
+    path ('sign-out/', SignOutView.as_view()),
     path ('<int:pk>/', UserDetailView.as_view()),
     path('password-reset/<str:username>/', UpdatePasswordView.as_view()),
     path ('<int:pk>/baskets/', BasketUserView.as_view()),
+    path ('connections/', ConnectionsView.as_view()),
+    path ('connections/suggestions/', ConnectionSuggestionsView.as_view()),
+    path ('<int:pk>/mutual/', MutualConnectionsView.as_view()),
 ]
\ No newline at end of file
@@ -2,26 +2,61 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 
 
-from users.models import User
+from users.models import User, ConnectionSuggestion
 from .serializers.common import UserSerializer
 from .serializers.populate import PopulatedUserSerializer
+from .serializers.graph import ConnectionSuggestionSerializer
+from utils.purge import soft_delete
+from utils.pagination import PaginatedView
+from .revocation import revoke_session, revoke_user_tokens
+from utils.throttling import SignInIPThrottle, SignInUserThrottle, SignUpIPThrottle, PasswordResetIPThrottle, PasswordResetUserThrottle
 
 
 # Create your views here.
 class SignUpView (APIView): 
+    #No authentication, so throttled requests are rejected before any DB access or password hashing
+    authentication_classes = []
+    throttle_classes = [SignUpIPThrottle]
+
     def post (self, request):
         serializer = UserSerializer(data= request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response ({'message':'User created successfully!'})
 
+class SignInView (TokenObtainPairView):
+    throttle_classes = [SignInIPThrottle, SignInUserThrottle]
+
+#New access token (and rotated refresh token) from a refresh token
+class RefreshView (TokenRefreshView):
+    throttle_classes = [SignInIPThrottle]
+
+#Revoke the session of the refresh token sent in the body and of the access token used for the request
+class SignOutView (APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post (self, request):
+        try:
+            refresh = RefreshToken(request.data.get('refresh', '') if isinstance(request.data, dict) else '')
+        except TokenError as error:
+            raise InvalidToken({'detail': str(error)})
+        if str(refresh.get(api_settings.USER_ID_CLAIM)) != str(request.user.id):
+            raise PermissionDenied
+        revoke_session(refresh)
+        revoke_session(request.auth)
+        return Response (status = 204)
+
 #Index of all users, only available after sign-in
 class UserView (APIView):
     permission_classes = [IsAuthenticated]
     def get (self, request):
-        allUsers = User.objects.all()
+        allUsers = User.objects.filter(deleted_at__isnull=True)
         serializer = UserSerializer(allUsers, many=True)
         return Response (serializer.data, status=201)
 
@@ -29,11 +64,11 @@ class UserDetailView (APIView):
     permission_classes = [IsAuthenticated]
     def get_user (self, pk):
         try: 
-            return User.objects.get (pk=pk)
+            return User.objects.get (pk=pk, deleted_at__isnull=True)
         except User.DoesNotExist:
             raise NotFound (detail= 'User is no longer available')
 
-    #Show personal details, with populated connections
+    #Show personal details, with the first connections populated (all of them are at auth/connections/)
     def get(self, request, pk): 
         user = self.get_user(pk)
         #Can this authorisation be automated?
@@ -51,6 +86,9 @@ class UserDetailView (APIView):
         serializer=UserSerializer(user, request.data, partial=True)
         serializer.is_valid(raise_exception = True)
         serializer.save()
+        #A new password signs out every existing session
+        if 'password' in request.data:
+            revoke_user_tokens(user)
         return Response (serializer.data)
 
     #Delete account completely
@@ -59,10 +97,14 @@ class UserDetailView (APIView):
         #Can this authorisation be automated?
         if request.user !=user:
             raise PermissionDenied
-        user.delete()
+        #Deactivated straight away, baskets and items are deleted later in batches
+        soft_delete(user)
         return Response (status = 204)
 
 class UpdatePasswordView(APIView):
+    authentication_classes = []
+    throttle_classes = [PasswordResetIPThrottle, PasswordResetUserThrottle]
+
     #Reset password
     def get_user (self, username):
         try: 
@@ -77,7 +119,31 @@ class UpdatePasswordView(APIView):
             new_password=123
             user.set_password (str(new_password))
             user.save()
+            revoke_user_tokens(user)
             return Response ({'message' : f'Updated the password for user {username } to {str(new_password)}'},status=200)
         except: 
             raise NotFound (detail= f'Could not update the password for user{username}')
-        
+
+
+#Paginated connections of the signed-in user
+class ConnectionsView (PaginatedView):
+    def get (self, request):
+        connections = request.user.connections.filter(deleted_at__isnull=True).prefetch_related('connections').order_by('username')
+        return self.paginate(connections, UserSerializer)
+
+#Connections the signed-in user has in common with another user
+class MutualConnectionsView (PaginatedView):
+    def get (self, request, pk):
+        mutual = request.user.connections.filter(connections=pk, deleted_at__isnull=True).prefetch_related('connections').order_by('username')
+        return self.paginate(mutual, UserSerializer)
+
+#People the signed-in user may want to share with, most shared baskets first
+class ConnectionSuggestionsView (PaginatedView):
+    def get (self, request):
+        suggestions = (ConnectionSuggestion.objects
+            .filter(user=request.user, candidate__deleted_at__isnull=True)
+            .exclude(candidate=request.user)
+            .select_related('candidate')
+            .prefetch_related('candidate__connections')
+            .order_by('-shared_baskets', '-mutual_connections', 'candidate'))
+        return self.paginate(suggestions, ConnectionSuggestionSerializer)
@@ -0,0 +1,137 @@
+import zlib
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError: #optional, `pip install brotli` to enable br
+    brotli = None
+
+DEFAULTS = {
+    'MIN_SIZE': 1024, #bytes, smaller bodies gain less than the headers and CPU cost
+    'GZIP_LEVEL': 1, #fastest level, most of the ratio on repetitive JSON for a fraction of the CPU
+    'BROTLI_QUALITY': 4,
+    'BROTLI': True,
+    'CONTENT_TYPES': ['application/json'],
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'API_COMPRESSION', {}).get(name, DEFAULTS[name])
+
+
+def parse_accept_encoding(header):
+    #{'gzip': 1.0, 'br': 0.5, ...} from an Accept-Encoding header
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli and get_setting('BROTLI') else ['gzip']
+    #Highest q wins, brotli first on a tie since it compresses JSON better
+    best, best_quality = None, 0.0
+    for coding in candidates:
+        quality = accepted.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def gzip_compressor():
+    return zlib.compressobj(get_setting('GZIP_LEVEL'), zlib.DEFLATED, 31) #31 = gzip container
+
+
+class BrotliCompressor:
+    #Same compress()/flush() interface as zlib's compressobj
+    def __init__(self):
+        self.compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=get_setting('BROTLI_QUALITY'))
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self, mode=None):
+        if mode == zlib.Z_SYNC_FLUSH:
+            return self.compressor.flush()
+        return self.compressor.finish()
+
+
+COMPRESSORS = {
+    'gzip': gzip_compressor,
+    'br': BrotliCompressor,
+}
+
+
+def compress(coding, content):
+    compressor = COMPRESSORS[coding]()
+    return compressor.compress(content) + compressor.flush()
+
+
+def compress_stream(coding, chunks):
+    #Flush after every chunk so the client gets data as soon as the view produces it
+    compressor = COMPRESSORS[coding]()
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip / brotli compression for API responses.
+    Only compresses CONTENT_TYPES bodies of at least MIN_SIZE bytes, at a cheap level,
+    weakens strong ETags (the bytes differ per encoding) and compresses sync streaming
+    responses chunk by chunk.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in get_setting('CONTENT_TYPES'):
+            return response
+        if response.streaming and response.is_async:
+            return response
+        if not response.streaming and len(response.content) < get_setting('MIN_SIZE'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(coding, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = compress(coding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = coding
+        return response
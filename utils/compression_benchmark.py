@@ -0,0 +1,98 @@
+"""
+CPU cost against bytes saved when compressing basket payloads.
+
+    python -m utils.compression_benchmark
+    python -m utils.compression_benchmark --baskets 50 --items 40 --runs 50
+
+The payload has the shape of a BasketUserView response (PopulatedBasketSerializer:
+baskets with owner, shared_with users and items), filled with realistic values.
+"""
+
+import argparse
+import json
+import random
+import time
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ITEM_NAMES = [
+    'Oat milk', 'Semi-skimmed milk', 'Sourdough bread', 'Free range eggs', 'Bananas', 'Apples',
+    'Cheddar cheese', 'Greek yoghurt', 'Chicken thighs', 'Basmati rice', 'Spaghetti', 'Tinned tomatoes',
+    'Olive oil', 'Washing up liquid', 'Toilet roll', 'Coffee beans', 'Porridge oats', 'Frozen peas',
+]
+STORES = ['Tesco', 'Sainsbury\'s', 'Lidl', 'Aldi', 'Waitrose', None]
+
+
+def make_user(user_id):
+    return {
+        'id': user_id,
+        'username': f'user{user_id}',
+        'email': f'user{user_id}@example.com',
+        'profile_image': f'https://res.cloudinary.com/demo/image/upload/v1/profile_{user_id}.jpg',
+        'connections': random.sample(range(1, 200), 5),
+        'is_staff': False,
+    }
+
+
+def make_payload(baskets, items):
+    random.seed(1)
+    result = []
+    for basket_id in range(1, baskets + 1):
+        owner = make_user(random.randint(1, 200))
+        result.append({
+            'id': basket_id,
+            'shared_with': [make_user(random.randint(1, 200)) for _ in range(random.randint(0, 3))],
+            'basket_items': [
+                {'id': basket_id * 1000 + n, 'name': random.choice(ITEM_NAMES),
+                 'status': random.choice(['active', 'bought', 'ignored']), 'basket': basket_id, 'creator': owner['id']}
+                for n in range(items)
+            ],
+            'owner': owner,
+            'name': f'Weekly shop {basket_id}',
+            'store': random.choice(STORES),
+            'created_at': f'2025-12-{random.randint(1, 28):02d}T10:{random.randint(0, 59):02d}:00.000000Z',
+            'status': random.choice(['Pending', 'Completed', 'Open']),
+        })
+    return json.dumps(result).encode()
+
+
+def codecs():
+    for level in (1, 3, 6, 9):
+        yield f'gzip-{level}', lambda data, level=level: zlib.compress(data, level, wbits=31)
+    if brotli:
+        for quality in (1, 4, 6, 11):
+            yield f'br-{quality}', lambda data, quality=quality: brotli.compress(data, mode=brotli.MODE_TEXT, quality=quality)
+
+
+def benchmark(data, runs):
+    print(f'{"codec":<10}{"bytes":>10}{"saved":>9}{"ms/resp":>10}{"MB/s":>9}')
+    print(f'{"none":<10}{len(data):>10}{"0%":>9}{0:>10.3f}{"-":>9}')
+    for name, compress in codecs():
+        start = time.perf_counter()
+        for _ in range(runs):
+            compressed = compress(data)
+        elapsed = (time.perf_counter() - start) / runs
+        saved = 1 - len(compressed) / len(data)
+        print(f'{name:<10}{len(compressed):>10}{saved:>9.1%}{elapsed * 1000:>10.3f}{len(data) / elapsed / 1e6:>9.1f}')
+    if not brotli:
+        print('(install the brotli package to include br)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baskets', type=int, default=20)
+    parser.add_argument('--items', type=int, default=25)
+    parser.add_argument('--runs', type=int, default=100)
+    options = parser.parse_args()
+    for baskets in sorted({1, options.baskets}):
+        data = make_payload(baskets, options.items)
+        print(f'\n{baskets} baskets x {options.items} items')
+        benchmark(data, options.runs)
+
+
+if __name__ == '__main__':
+    main()
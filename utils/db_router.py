@@ -0,0 +1,77 @@
+import hashlib
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+#Reads stay on the primary unless ReplicaPinningMiddleware lets a safe, unpinned request use a replica.
+#Management commands, the task worker and after-commit tasks never set it, so they always see the primary
+use_replicas = ContextVar('use_replicas', default=False)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def pin_to_primary():
+    use_replicas.set(False)
+
+
+def client_key(request):
+    #Identify the client without touching the DB: a hash of its token, or its forwarded IP when anonymous.
+    #The IP is resolved like the throttles do (NUM_PROXIES), REMOTE_ADDR alone is the platform router's
+    auth = request.headers.get('Authorization')
+    ident = hashlib.sha1(auth.encode()).hexdigest() if auth else BaseThrottle().get_ident(request)
+    return f'db_pin:{ident}'
+
+
+class ReplicaRouter:
+    """
+    Send reads to a random replica when the current request allows it, and writes to the primary ('default').
+    After the first write, every query for the rest of the request goes to the primary.
+    """
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas or not use_replicas.get():
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        #Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        #Replicas get their schema through replication
+        return db not in get_replicas()
+
+
+class ReplicaPinningMiddleware:
+    """
+    Decide per request whether reads may use a replica: only safe requests from clients that
+    haven't written in the last DATABASE_REPLICA_LAG seconds do, so they read their own writes.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replicas():
+            return self.get_response(request)
+
+        cache = caches[getattr(settings, 'DATABASE_PIN_CACHE', 'default')]
+        key = client_key(request)
+        safe = request.method in SAFE_METHODS
+        token = use_replicas.set(safe and not cache.get(key))
+        try:
+            response = self.get_response(request)
+            if not safe and response.status_code < 400:
+                cache.set(key, True, getattr(settings, 'DATABASE_REPLICA_LAG', 5))
+            return response
+        finally:
+            use_replicas.reset(token)
@@ -0,0 +1,87 @@
+import hashlib
+import json
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.http.request import RawPostDataException
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+IN_FLIGHT = 'in-flight'
+
+
+def get_store():
+    #Keyed response store. It has to be shared by every worker (see CACHES), or a retry landing on another one runs twice
+    return caches[getattr(settings, 'IDEMPOTENCY_CACHE', 'default')]
+
+
+def get_ttl():
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+
+
+def make_key(user_id, method, path, key):
+    #Keys are scoped per user and endpoint so two clients can never read each other's responses
+    return f'idem:{user_id}:{method}:{path}:{key}'
+
+
+def fingerprint(payload):
+    #Hash of the request payload, a key reused with a different payload is refused instead of replayed
+    if not isinstance(payload, bytes):
+        payload = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def request_fingerprint(request):
+    try:
+        return fingerprint(request._request.body)
+    except RawPostDataException:
+        #The body stream was already parsed, fall back to the parsed data
+        return fingerprint(request.data)
+
+
+def run_once(user_id, method, path, key, func, digest=''):
+    """
+    Run func() once per idempotency key and return (status, data, replayed).
+    A retry with the same key and payload digest gets the stored result back without running func again.
+    """
+    store = get_store()
+    cache_key = make_key(user_id, method, path, key)
+    stored = store.get(cache_key)
+    if stored is None and store.add(cache_key, (digest, IN_FLIGHT), get_ttl()):
+        try:
+            status, data = func()
+        except Exception:
+            store.delete(cache_key)
+            raise
+        if status < 500:
+            store.set(cache_key, (digest, (status, data)), get_ttl())
+        else:
+            store.delete(cache_key)
+        return status, data, False
+    if stored is not None and stored[0] != digest:
+        return 422, {'detail': 'This Idempotency-Key was already used with a different request.'}, False
+    if stored is None or stored[1] == IN_FLIGHT:
+        return 409, {'detail': 'A request with this Idempotency-Key is still being processed.'}, True
+    status, data = stored[1]
+    return status, data, True
+
+
+def idempotent(handler):
+    #Decorator for APIView write handlers, honours the Idempotency-Key header when the client sends one
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return handler(self, request, *args, **kwargs)
+
+        def call():
+            response = handler(self, request, *args, **kwargs)
+            return response.status_code, response.data
+
+        digest = request_fingerprint(request)
+        status, data, replayed = run_once(request.user.id, request.method, request.path, key, call, digest)
+        response = Response(data, status=status)
+        if replayed:
+            response['Idempotent-Replayed'] = 'true'
+        return response
+    return wrapper
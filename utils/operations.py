@@ -0,0 +1,62 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class PostgresRunSQL(migrations.RunSQL):
+    #RunSQL for Postgres-only features (triggers, GIN and operator-class indexes), a no-op on other databases such as local SQLite
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class PostgresAddIndexConcurrently(AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY for Postgres-only index types (GIN), so writes carry on while it builds.
+    The migration has to be atomic = False. The index stays out of the migration state like the
+    PostgresRunSQL ones, since SQLite can neither create it nor rebuild a table that declares it.
+    """
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def batched_update(table, assignment, batch_size=5000):
+    """
+    Backfill `UPDATE table SET assignment` on Postgres in primary key ranges. In an atomic = False
+    migration each batch commits on its own, so rows are only locked for one batch at a time.
+    """
+    def forwards(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'SELECT min(id), max(id) FROM {table}')
+            low, high = cursor.fetchone()
+            if low is None:
+                return
+            for start in range(low, high + 1, batch_size):
+                cursor.execute(f'UPDATE {table} SET {assignment} WHERE id >= %s AND id < %s', [start, start + batch_size])
+
+    return migrations.RunPython(forwards, migrations.RunPython.noop)
+
+
+def upper_pattern_index(name, table, column):
+    """
+    Index for the admin's prefix (^) and exact (=) searches, which Django runs as
+    UPPER(column::text) LIKE UPPER('term%'). text_pattern_ops lets Postgres use it
+    for LIKE whatever the database collation.
+    """
+    return PostgresRunSQL(
+        f'CREATE INDEX IF NOT EXISTS {name} ON {table} (UPPER({column}::text) text_pattern_ops)',
+        f'DROP INDEX IF EXISTS {name}',
+    )
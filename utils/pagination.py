@@ -0,0 +1,18 @@
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+
+class ListPagination (LimitOffsetPagination):
+    default_limit = 50
+    max_limit = 200
+
+#Lists that grow without bound, ?limit=&offset= with count/next/previous links
+class PaginatedView (APIView):
+    permission_classes = [IsAuthenticated]
+
+    def paginate (self, queryset, serializer_class):
+        paginator = ListPagination()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        serializer = serializer_class(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
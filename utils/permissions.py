@@ -1,4 +1,5 @@
 from rest_framework.permissions import BasePermission
+from rest_framework.exceptions import NotFound
 from baskets.models import Basket
 from items.models import Item
 
@@ -23,10 +24,11 @@ class HasItemPermission (BasePermission):
     def has_permission (self, request, view):
         item_pk = view.kwargs.get('pk')
         try: 
-            item = Item.objects.get(pk = item_pk)
+            #Items of a soft-deleted basket are gone too
+            item = Item.objects.get(pk = item_pk, basket__deleted_at__isnull = True)
             is_basket_owner =item.basket.owner == request.user
             is_basket_shared = request.user in item.basket.shared_with.all()
             return is_basket_owner or is_basket_shared
         except Item.DoesNotExist: 
-            return False
+            raise NotFound(detail = 'Item is no longer available')
         
\ No newline at end of file
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from baskets.models import Basket, ArchivedBasket
+from items.models import Item, ArchivedItem, ItemSuggestion
+from users.models import User, ConnectionSuggestion
+from tasks.queue import task
+
+
+def table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def delete_in_batches(model, where, params, batch_size, progress=None):
+    """
+    DELETE rows of `model` matching `where` at most `batch_size` at a time, each batch in its own short transaction.
+    Raw SQL on purpose: the ORM's CASCADE collector would load every row into memory first.
+    """
+    name = table(model)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    sql = f'DELETE FROM {name} WHERE {pk} IN (SELECT {pk} FROM {name} WHERE {where} LIMIT %s)'
+    total = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [*params, batch_size])
+            deleted = cursor.rowcount
+        total += deleted
+        if progress and deleted:
+            progress(f'{model._meta.db_table}: {total} rows deleted')
+        if deleted < batch_size:
+            return total
+
+
+def purge_basket(basket_id, batch_size=1000, progress=None):
+    #Delete a basket's dependents in batches, then the basket row itself
+    delete_in_batches(Basket.shared_with.through, 'basket_id = %s', [basket_id], batch_size, progress)
+    delete_in_batches(Item, 'basket_id = %s', [basket_id], batch_size, progress)
+    delete_in_batches(Basket, 'id = %s', [basket_id], 1, progress)
+
+
+def purge_user(user_id, batch_size=1000, progress=None):
+    #Delete everything a user owns or appears in, in batches, then let the ORM delete the (now light) user row
+    for basket_id in Basket.all_objects.filter(owner_id=user_id).values_list('id', flat=True).iterator():
+        purge_basket(basket_id, batch_size, progress)
+
+    for basket_id in ArchivedBasket.objects.filter(owner_id=user_id).values_list('id', flat=True).iterator():
+        delete_in_batches(ArchivedBasket.shared_with.through, 'archivedbasket_id = %s', [basket_id], batch_size, progress)
+        delete_in_batches(ArchivedItem, 'basket_id = %s', [basket_id], batch_size, progress)
+        delete_in_batches(ArchivedBasket, 'id = %s', [basket_id], 1, progress)
+
+    delete_in_batches(Item, 'creator_id = %s', [user_id], batch_size, progress)
+    delete_in_batches(ArchivedItem, 'creator_id = %s', [user_id], batch_size, progress)
+    delete_in_batches(Basket.shared_with.through, 'user_id = %s', [user_id], batch_size, progress)
+    delete_in_batches(ArchivedBasket.shared_with.through, 'user_id = %s', [user_id], batch_size, progress)
+    delete_in_batches(User.connections.through, 'from_user_id = %s OR to_user_id = %s', [user_id, user_id], batch_size, progress)
+    delete_in_batches(ConnectionSuggestion, 'user_id = %s OR candidate_id = %s', [user_id, user_id], batch_size, progress)
+    delete_in_batches(ItemSuggestion, 'user_id = %s', [user_id], batch_size, progress)
+
+    User.objects.filter(pk=user_id).delete()
+
+
+@task
+def purge_basket_task(basket_id):
+    if Basket.all_objects.filter(pk=basket_id, deleted_at__isnull=False).exists():
+        purge_basket(basket_id, getattr(settings, 'PURGE_BATCH_SIZE', 1000))
+
+
+@task
+def purge_user_task(user_id):
+    if User.objects.filter(pk=user_id, deleted_at__isnull=False).exists():
+        purge_user(user_id, getattr(settings, 'PURGE_BATCH_SIZE', 1000))
+
+
+def purge_deleted(batch_size=1000, progress=None):
+    #Purge every soft-deleted user and basket, returns how many of each were removed
+    users = list(User.objects.filter(deleted_at__isnull=False).values_list('pk', flat=True))
+    for user_id in users:
+        if progress:
+            progress(f'Purging user {user_id}')
+        purge_user(user_id, batch_size, progress)
+
+    baskets = list(Basket.all_objects.filter(deleted_at__isnull=False).values_list('pk', flat=True))
+    for basket_id in baskets:
+        if progress:
+            progress(f'Purging basket {basket_id}')
+        purge_basket(basket_id, batch_size, progress)
+    return len(users), len(baskets)
+
+
+@transaction.atomic
+def soft_delete(obj):
+    #Hide the object now and queue its purge, in this process's task pool when PURGE_IN_PROCESS is on,
+    #otherwise on the durable queue for `manage.py run_tasks` (`manage.py purge_deleted` also sweeps everything)
+    obj.deleted_at = timezone.now()
+    if isinstance(obj, User):
+        obj.is_active = False
+        obj.save(update_fields=['deleted_at', 'is_active'])
+        #Their baskets disappear for shared_with members too, purge_user removes them with the user
+        Basket.objects.filter(owner=obj).update(deleted_at=obj.deleted_at)
+        purge, key = purge_user_task, f'user:{obj.pk}'
+    else:
+        obj.save(update_fields=['deleted_at'])
+        purge, key = purge_basket_task, f'basket:{obj.pk}'
+
+    if getattr(settings, 'PURGE_IN_PROCESS', False):
+        purge.defer(obj.pk, key=key)
+    else:
+        purge.enqueue(obj.pk, key=key)
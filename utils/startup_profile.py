@@ -0,0 +1,92 @@
+"""
+Import-time profile and cold start benchmark for the project.
+
+    python -m utils.startup_profile              # profile + benchmark family_basket.wsgi
+    python -m utils.startup_profile --runs 20 --top 30 --module family_basket.settings
+
+Each run is a fresh interpreter, so the numbers match what a new gunicorn
+worker (or a scaled-out dyno) pays before serving its first request.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Load the WSGI app and the URLconf, the same work a worker does before its first request
+WARM_UP = (
+    'import {module}\n'
+    'from django.conf import settings\n'
+    'if settings.configured and "{module}".endswith("wsgi"):\n'
+    '    from django.urls import get_resolver\n'
+    '    get_resolver().url_patterns\n'
+)
+
+
+def run_child(module, importtime=False):
+    args = [sys.executable]
+    if importtime:
+        args += ['-X', 'importtime']
+    args += ['-c', WARM_UP.format(module=module)]
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'family_basket.settings')}
+    start = time.perf_counter()
+    result = subprocess.run(args, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode:
+        sys.exit(result.stderr)
+    return elapsed, result.stderr
+
+
+def parse_importtime(output):
+    #Lines look like "import time:       self [us] |  cumulative | imported package"
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def profile(module, top):
+    _, output = run_child(module, importtime=True)
+    rows = parse_importtime(output)
+    # Self times never overlap, so summing them per top-level package shows where the time really goes
+    packages = {}
+    for _, self_us, name in rows:
+        root = name.strip().split('.')[0]
+        packages[root] = packages.get(root, 0) + self_us
+
+    print(f'Slowest imports for {module} (cumulative ms):')
+    for cumulative, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f'{cumulative / 1000:10.1f} {self_us / 1000:8.1f}  {name}')
+    print('\nSelf time by top-level package (ms):')
+    for root, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f'{self_us / 1000:10.1f}  {root}')
+
+
+def benchmark(module, runs):
+    baseline = [run_child('sys')[0] for _ in range(runs)]
+    timings = [run_child(module)[0] for _ in range(runs)]
+    interpreter = statistics.median(baseline)
+    print(f'\nCold start of {module} over {runs} runs (ms):')
+    print(f'  interpreter only  {interpreter * 1000:8.1f}')
+    print(f'  median            {statistics.median(timings) * 1000:8.1f}')
+    print(f'  min / max         {min(timings) * 1000:8.1f} / {max(timings) * 1000:.1f}')
+    print(f'  project import    {(statistics.median(timings) - interpreter) * 1000:8.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='family_basket.wsgi')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=20)
+    options = parser.parse_args()
+    profile(options.module, options.top)
+    benchmark(options.module, options.runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+import itertools
+import threading
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LocalCounter:
+    """
+    In-process sliding window counter, for single-node runs and tests.
+    Each key keeps the hit counts of the current and previous fixed window.
+    Keys are kept in least recently hit order, so a full counter forgets the quietest keys first.
+    """
+    max_keys = 10000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.windows = {}
+
+    def get_counts(self, key, window):
+        start, current, previous = self.windows.get(key, (window, 0, 0))
+        if start == window:
+            return current, previous
+        if start == window - 1:
+            return 0, current
+        return 0, 0
+
+    def hit(self, key, window, limit, estimate, timeout=None):
+        with self.lock:
+            current, previous = self.get_counts(key, window)
+            entry = self.windows.pop(key, None)
+            if estimate(current, previous) >= limit:
+                #Rejected hits count as activity too, a throttled key must not be the first one evicted
+                if entry is not None:
+                    self.windows[key] = entry
+                return False, current, previous
+            if len(self.windows) >= self.max_keys:
+                self.evict(window)
+            self.windows[key] = (window, current + 1, previous)
+            return True, current + 1, previous
+
+    def evict(self, window):
+        #Drop keys whose windows can no longer count, then the least recently hit tenth if everything is live.
+        #Never everything: spraying new keys must not reset the count of a key under attack
+        stale = [key for key, (start, _, _) in self.windows.items() if start < window - 1]
+        for key in stale:
+            del self.windows[key]
+        if len(self.windows) >= self.max_keys:
+            for key in list(itertools.islice(self.windows, max(1, self.max_keys // 10))):
+                del self.windows[key]
+
+    def clear(self):
+        with self.lock:
+            self.windows.clear()
+
+
+class CacheCounter:
+    #Sliding window counter stored in a Django cache, shared between workers when the cache is
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def hit(self, key, window, limit, estimate, timeout=None):
+        current_key, previous_key = f'{key}:{window}', f'{key}:{window - 1}'
+        counts = self.cache.get_many([current_key, previous_key])
+        current, previous = counts.get(current_key, 0), counts.get(previous_key, 0)
+        if estimate(current, previous) >= limit:
+            return False, current, previous
+        if self.cache.add(current_key, 1, timeout):
+            return True, 1, previous
+        try:
+            return True, self.cache.incr(current_key), previous
+        except ValueError:
+            #The key expired between add() and incr()
+            self.cache.set(current_key, 1, timeout)
+            return True, 1, previous
+
+    def clear(self):
+        self.cache.clear()
+
+
+local_counter = LocalCounter()
+
+
+def get_counter():
+    if getattr(settings, 'THROTTLE_COUNTER', 'cache') == 'local':
+        return local_counter
+    return CacheCounter(getattr(settings, 'THROTTLE_CACHE', 'default'))
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Rate throttle using a sliding window counter instead of DRF's list of timestamps.
+    The previous window's count is weighted by how much of it still overlaps the sliding window.
+    Only reads request headers, body and url kwargs, so it is safe to run before any DB access.
+    """
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+
+    def get_ident_value(self, request, view):
+        raise NotImplementedError('.get_ident_value() must be overridden')
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request, view)
+        if not ident:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.elapsed = (self.now % self.duration) / self.duration
+
+        def estimate(current, previous):
+            return previous * (1 - self.elapsed) + current
+
+        #Counts have to outlive the window they belong to, so the next window can still weight them
+        allowed, self.current, self.previous = get_counter().hit(self.key, window, self.num_requests, estimate, self.duration * 2)
+        return allowed
+
+    def wait(self):
+        remaining = self.duration * (1 - self.elapsed)
+        if self.current >= self.num_requests or not self.previous:
+            return remaining
+        #Time until the previous window's weight has shrunk enough to let one more request in
+        overlap_needed = (self.num_requests - self.current) / self.previous
+        return max(0, self.duration * (1 - overlap_needed) - self.duration * self.elapsed)
+
+
+class IPThrottle(SlidingWindowThrottle):
+    def get_ident_value(self, request, view):
+        return self.get_ident(request)
+
+
+class UsernameThrottle(SlidingWindowThrottle):
+    #Keyed on the account being targeted, so one account can't be hammered from many IPs
+    def get_ident_value(self, request, view):
+        username = view.kwargs.get('username')
+        if not username and isinstance(request.data, dict):
+            username = request.data.get('username')
+        if isinstance(username, str) and username:
+            return username.lower()
+        return None
+
+
+class SignInIPThrottle(IPThrottle):
+    scope = 'sign_in'
+
+
+class SignInUserThrottle(UsernameThrottle):
+    scope = 'sign_in_user'
+
+
+class SignUpIPThrottle(IPThrottle):
+    scope = 'sign_up'
+
+
+class PasswordResetIPThrottle(IPThrottle):
+    scope = 'password_reset'
+
+
+class PasswordResetUserThrottle(UsernameThrottle):
+    scope = 'password_reset_user'